@@ -25,6 +25,9 @@ setup(
         'boto3>=1.26.0',
         'pyyaml>=6.0',
     ],
+    extras_require={
+        'fast': ['orjson>=3.0'],
+    },
     entry_points={
         'console_scripts': [
             'tern=tern.cli:main',
@@ -3,10 +3,103 @@
 import json
 import sys
 import boto3
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 from botocore.exceptions import ClientError
 from botocore.config import Config as BotoConfig
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+
+_PROMPT_TMPL = """Analyze this command output. Provide helpful commentary about what happened, explain any errors, and suggest improvements or best practices where relevant. Be concise and practical.
+
+Command: `{command}`
+Return Code: {rc}
+
+Output:
+```
+{out}
+```
+
+Errors:
+```
+{err}
+```"""
+
+
+def _anthropic_body(prompt: str) -> dict:
+    """Request body for Anthropic models (Messages API)."""
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 2000,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.3,
+        "top_p": 0.9
+    }
+
+
+def _generic_body(prompt: str) -> dict:
+    """Request body for models that take a plain prompt."""
+    return {
+        "prompt": prompt,
+        "max_tokens": 2000,
+        "temperature": 0.3
+    }
+
+
+# (substrings of the lowercased model ID, body builder), checked in order
+_MODEL_FAMILIES = (
+    (('claude', 'anthropic'), _anthropic_body),
+)
+
+
+@lru_cache(maxsize=None)
+def _body_builder(model_id: str) -> Callable[[str], dict]:
+    """Pick the request body builder for a model ID, once per ID."""
+    model_id_lower = model_id.lower()
+    for markers, builder in _MODEL_FAMILIES:
+        if any(marker in model_id_lower for marker in markers):
+            return builder
+    return _generic_body
+
+
+def _first_text(items: list) -> str:
+    """Text of the first entry in a list-shaped response field."""
+    return items[0].get('text', '')
+
+
+def _content_text(content):
+    """Text from a 'content' field, either a block list or a plain string."""
+    return _first_text(content) if isinstance(content, list) else content
+
+
+def _as_is(value):
+    """Field that already holds the text."""
+    return value
+
+
+# (response key, text extractor), checked in order; Claude's 'content' first
+_RESPONSE_EXTRACTORS = (
+    ('content', _content_text),
+    ('completion', _as_is),
+    ('completions', _first_text),
+    ('text', _as_is),
+    ('output', _as_is),
+    ('generated_text', _as_is),
+)
+
 
 class AIAnalyzer:
     """Handles AI analysis using AWS Bedrock."""
@@ -27,7 +120,9 @@ class AIAnalyzer:
             config = BotoConfig(
                 read_timeout=timeout,
                 connect_timeout=10,
-                retries={'max_attempts': 2}
+                retries={'max_attempts': 2},
+                tcp_keepalive=True,
+                max_pool_connections=10
             )
             
             return boto3.client('bedrock-runtime', region_name=region, config=config)
@@ -40,26 +135,27 @@ class AIAnalyzer:
         """Analyze command output using AI."""
         if not self.bedrock_client:
             return None
-            
+        
+        debug = self.config.get('debug', False)
         try:
-            if self.config.get('debug', False):
+            if debug:
                 print(f"[DEBUG] Starting AI analysis for command: {command}")
             
             prompt = self._build_prompt(command, output, errors, return_code)
             
-            if self.config.get('debug', False):
+            if debug:
                 print(f"[DEBUG] Prompt length: {len(prompt)} chars")
             
             response = self._invoke_model(prompt)
             
-            if self.config.get('debug', False):
+            if debug:
                 print(f"[DEBUG] AI analysis complete")
             
             return response
             
         except Exception as e:
             print(f"\n❌ ERROR: AI analysis failed: {e}", file=sys.stderr)
-            if self.config.get('debug', False):
+            if debug:
                 import traceback
                 traceback.print_exc()
             return None
@@ -69,86 +165,52 @@ class AIAnalyzer:
         output_limit = self.config.get('limits.output_chars', 15000)
         error_limit = self.config.get('limits.error_chars', 5000)
         
-        prompt = f"""Analyze this command output. Provide helpful commentary about what happened, explain any errors, and suggest improvements or best practices where relevant. Be concise and practical.
-
-Command: `{command}`
-Return Code: {return_code}
-
-Output:
-```
-{output[:output_limit] if output else "(no output)"}
-```
-
-Errors:
-```
-{errors[:error_limit] if errors else "(no errors)"}
-```"""
-        
-        return prompt
+        # Send the end of each stream: that's where summaries and errors land
+        return _PROMPT_TMPL.format_map({
+            'command': command,
+            'rc': return_code,
+            'out': output[-output_limit:] if output else "(no output)",
+            'err': errors[-error_limit:] if errors else "(no errors)"
+        })
     
     def _invoke_model(self, prompt: str) -> Optional[str]:
         """Invoke the Bedrock model."""
+        debug = self.config.get('debug', False)
         try:
-            model_id = self.config.bedrock.get('model_id')
+            bedrock = self.config.bedrock
+            model_id = bedrock.get('model_id')
             if not model_id:
                 print("❌ ERROR: No model_id configured in ~/.tern.conf", file=sys.stderr)
                 return None
             
-            if self.config.get('debug', False):
+            if debug:
                 print(f"[DEBUG] Invoking model: {model_id}")
-                print(f"[DEBUG] Region: {self.config.bedrock.get('region')}")
-                print(f"[DEBUG] Timeout: {self.config.bedrock.get('timeout', 180)}s")
-            
-            if 'claude' in model_id.lower() or 'anthropic' in model_id.lower():
-                request_body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.3,
-                    "top_p": 0.9
-                }
-            else:
-                request_body = {
-                    "prompt": prompt,
-                    "max_tokens": 2000,
-                    "temperature": 0.3
-                }
+                print(f"[DEBUG] Region: {bedrock.get('region')}")
+                print(f"[DEBUG] Timeout: {bedrock.get('timeout', 180)}s")
             
-            if self.config.get('debug', False):
+            request_body = _body_builder(model_id)(prompt)
+            
+            if debug:
                 print(f"[DEBUG] Sending request to Bedrock...")
                 import time
                 start_time = time.time()
             
             response = self.bedrock_client.invoke_model(
                 modelId=model_id,
-                body=json.dumps(request_body),
+                body=_dumps(request_body),
                 contentType='application/json',
                 accept='application/json'
             )
             
-            if self.config.get('debug', False):
+            if debug:
                 elapsed = time.time() - start_time
                 print(f"[DEBUG] Bedrock response received in {elapsed:.2f}s")
             
-            response_body = json.loads(response['body'].read())
+            response_body = _loads(response['body'].read())
             
-            if 'content' in response_body:
-                if isinstance(response_body['content'], list):
-                    return response_body['content'][0].get('text', '')
-                return response_body['content']
-            elif 'completion' in response_body:
-                return response_body['completion']
-            elif 'completions' in response_body:
-                return response_body['completions'][0].get('text', '')
-            else:
-                for key in ['text', 'output', 'generated_text']:
-                    if key in response_body:
-                        return response_body[key]
+            for key, extract in _RESPONSE_EXTRACTORS:
+                if key in response_body:
+                    return extract(response_body[key])
             
             return str(response_body)
             
@@ -164,7 +226,7 @@ Errors:
                 print("   2. Your IAM user/role has bedrock:InvokeModel permission", file=sys.stderr)
                 print(f"   3. You have access to model: {model_id}", file=sys.stderr)
             elif error_code == 'ResourceNotFoundException':
-                print(f"   Model '{model_id}' not found in region '{self.config.bedrock.get('region')}'.", file=sys.stderr)
+                print(f"   Model '{model_id}' not found in region '{bedrock.get('region')}'.", file=sys.stderr)
                 print("   Please check your ~/.tern.conf settings.", file=sys.stderr)
             elif error_code == 'ExpiredTokenException' or error_code == 'TokenRefreshRequired':
                 print("   AWS credentials have expired.", file=sys.stderr)
@@ -195,7 +257,7 @@ Errors:
             if 'credentials' in str(e).lower() or 'token' in str(e).lower():
                 print("   This appears to be a credentials issue.", file=sys.stderr)
                 print("   Please run 'aws configure' or check your AWS environment variables.", file=sys.stderr)
-            if self.config.get('debug', False):
+            if debug:
                 import traceback
                 traceback.print_exc()
             return None
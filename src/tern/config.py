@@ -3,9 +3,34 @@
 import os
 import sys
 import json
+import math
+import tempfile
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def _is_positive_int(value: Any) -> bool:
+    """Whether value is a whole number greater than zero (booleans excluded)."""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+@lru_cache(maxsize=None)
+def _split_key(key: str) -> Tuple[str, ...]:
+    """Split a dotted config key, memoized since callers reuse a handful of keys."""
+    return tuple(key.split('.'))
 
 
 class Config:
@@ -38,6 +63,19 @@ class Config:
         'TERN_DEBUG': 'debug'
     }
     
+    # ENV_VAR_MAP with the dotted paths split up front
+    _ENV_VAR_KEYS = {env: tuple(path.split('.')) for env, path in ENV_VAR_MAP.items()}
+    
+    # Settings that only make sense as whole numbers greater than zero
+    _POSITIVE_INT_KEYS = frozenset({
+        ('bedrock', 'timeout'),
+        ('limits', 'output_chars'),
+        ('limits', 'error_chars'),
+        ('limits', 'max_lines'),
+    })
+    
+    CACHE_SUFFIX = '.cache'
+    
     def __init__(self, config_path: Optional[str] = None, require_config_file: bool = True):
         """Initialize configuration.
         
@@ -50,14 +88,21 @@ class Config:
             config_path: Optional path to config file
             require_config_file: If False, allows running without config file (for testing)
         """
-        import copy
-        self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+        # DEFAULT_CONFIG nests one level deep, so a two-level copy is enough
+        self.config = {k: (dict(v) if isinstance(v, dict) else v)
+                       for k, v in self.DEFAULT_CONFIG.items()}
         self.require_config_file = require_config_file
         
         self.config_path = config_path or str(Path.home() / '.tern.conf')
         
-        if os.path.exists(self.config_path):
-            self._load_config()
+        # One stat answers both "does it exist" and "is the parse cache current"
+        try:
+            st = os.stat(self.config_path)
+        except (OSError, ValueError):
+            st = None
+        
+        if st is not None:
+            self._load_config(st)
         elif not require_config_file:
             self.config['bedrock']['model_id'] = 'test-model-id'
             self.config['bedrock']['region'] = 'us-east-1'
@@ -67,7 +112,7 @@ class Config:
         if require_config_file:
             if not self.config.get('bedrock', {}).get('model_id') or \
                not self.config.get('bedrock', {}).get('region'):
-                if not os.path.exists(self.config_path):
+                if st is None:
                     print(f"ERROR: Configuration file not found at {self.config_path}")
                     print("Please create the config file or set environment variables:")
                     print("  - bedrock.model_id (or TERN_BEDROCK_MODEL_ID)")
@@ -89,15 +134,25 @@ class Config:
                 self.config['bedrock']['region'] = 'us-east-1'
     
     
-    def _load_config(self):
-        """Load configuration from YAML or JSON file."""
+    def _load_config(self, st: Optional[os.stat_result] = None) -> bool:
+        """Load configuration from YAML or JSON file.
+        
+        Args:
+            st: stat result for the config file, if the caller already has one
+        
+        Returns:
+            True if the file was parsed and merged, False if loading failed
+        """
         try:
-            with open(self.config_path, 'r') as f:
-                content = f.read()
-                try:
-                    loaded_config = json.loads(content) if content.strip() else {}
-                except json.JSONDecodeError:
-                    loaded_config = yaml.safe_load(content) or {}
+            if st is None:
+                st = os.stat(self.config_path)
+            loaded_config = self._read_config_cache(st)
+            if loaded_config is None:
+                with open(self.config_path, 'r') as f:
+                    content = f.read()
+                loaded_config, parsed_as_yaml = self._parse_config(content)
+                if parsed_as_yaml:
+                    self._write_config_cache(st, loaded_config)
             
             self._deep_merge(self.config, loaded_config)
             
@@ -110,42 +165,129 @@ class Config:
                     self.config['bedrock']['region'] = 'us-east-1'
             
             self._validate_config()
+            return True
             
         except Exception as e:
             print(f"Warning: Failed to load config from {self.config_path}: {e}")
+            return False
+    
+    def _parse_config(self, content: str):
+        """Parse config file content as JSON or YAML.
+        
+        The decoder is picked from the first non-whitespace character so YAML
+        files are not run through a failing JSON parse first. Files ending in
+        .json are never parsed as YAML.
+        
+        Returns:
+            Tuple of (parsed config, whether it was parsed as YAML)
+        """
+        stripped = content.lstrip()
+        if not stripped:
+            return {}, False
+        
+        is_json_file = self.config_path.endswith('.json')
+        if is_json_file or stripped[0] in '{[':
+            try:
+                return _loads(content), False
+            except json.JSONDecodeError:
+                if is_json_file:
+                    raise
+        
+        return yaml.load(content, Loader=_YamlLoader) or {}, True
+    
+    def _cache_enabled(self) -> bool:
+        """Check whether the parsed config cache may be used."""
+        return os.environ.get('TERN_NO_CACHE', '').lower() not in ('1', 'true')
+    
+    def _read_config_cache(self, st: os.stat_result) -> Optional[Dict]:
+        """Return the cached parse of the config file if it is still current.
+        
+        The cache lives next to the config file (e.g. ~/.tern.conf.cache) and
+        is keyed by the config file's mtime and size.
+        """
+        if not self._cache_enabled():
+            return None
+        try:
+            with open(self.config_path + self.CACHE_SUFFIX, 'r') as f:
+                cached = _loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if (isinstance(cached, dict)
+                and cached.get('mtime_ns') == st.st_mtime_ns
+                and cached.get('size') == st.st_size
+                and isinstance(cached.get('config'), dict)):
+            return cached['config']
+        return None
+    
+    def _write_config_cache(self, st: os.stat_result, loaded_config: Any):
+        """Atomically store a parsed YAML config for reuse by later runs.
+        
+        Only configs that survive a JSON round trip unchanged are cached, so a
+        cache hit always yields exactly what the YAML parser produced.
+        """
+        if not self._cache_enabled() or not isinstance(loaded_config, dict):
+            return
+        try:
+            payload = json.dumps({
+                'mtime_ns': st.st_mtime_ns,
+                'size': st.st_size,
+                'config': loaded_config
+            })
+            if _loads(payload)['config'] != loaded_config:
+                return
+        except (TypeError, ValueError):
+            return
+        
+        cache_path = self.config_path + self.CACHE_SUFFIX
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(cache_path) or '.', prefix='.tern-cache-'
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
     
     def _load_env_vars(self):
         """Load configuration from environment variables.
         
         Environment variables override config file settings.
         """
-        for env_var, config_path in self.ENV_VAR_MAP.items():
+        for env_var, keys in self._ENV_VAR_KEYS.items():
             value = os.environ.get(env_var)
-            if value is not None:
-                keys = config_path.split('.')
-                
-                if value.lower() in ('true', 'false'):
-                    value = value.lower() == 'true'
-                elif value.isdigit():
+            if value is None:
+                continue
+            
+            lowered = value.lower()
+            if lowered == 'true':
+                value = True
+            elif lowered == 'false':
+                value = False
+            else:
+                try:
                     value = int(value)
-                elif '.' in value and all(part.isdigit() for part in value.split('.', 1)):
+                except ValueError:
                     try:
                         value = float(value)
                     except ValueError:
                         pass
-                
-                if len(keys) == 1:
-                    self.config[keys[0]] = value
-                elif len(keys) == 2:
-                    if keys[0] not in self.config:
-                        self.config[keys[0]] = {}
-                    self.config[keys[0]][keys[1]] = value
-                elif len(keys) == 3:
-                    if keys[0] not in self.config:
-                        self.config[keys[0]] = {}
-                    if keys[1] not in self.config[keys[0]]:
-                        self.config[keys[0]][keys[1]] = {}
-                    self.config[keys[0]][keys[1]][keys[2]] = value
+            
+            if keys in self._POSITIVE_INT_KEYS and not _is_positive_int(value):
+                print(f"Warning: Ignoring {env_var}={os.environ[env_var]!r}: "
+                      f"expected a whole number greater than zero")
+                continue
+            
+            section = self.config
+            for k in keys[:-1]:
+                section = section.setdefault(k, {})
+            section[keys[-1]] = value
     
     def _validate_config(self):
         """Validate and sanitize configuration values."""
@@ -157,9 +299,18 @@ class Config:
                 except ValueError:
                     timeout = 180
             if isinstance(timeout, (int, float)):
+                if not math.isfinite(timeout):
+                    timeout = 180
                 timeout = abs(timeout) if timeout < 0 else timeout
                 timeout = min(timeout, 3600)
-                self.config['bedrock']['timeout'] = int(timeout)
+                self.config['bedrock']['timeout'] = int(timeout) or 180
+        
+        # A zero, negative or fractional limit would leave nothing to analyze
+        limits = self.config.get('limits')
+        if isinstance(limits, dict):
+            for key, default in self.DEFAULT_CONFIG['limits'].items():
+                if key in limits and not _is_positive_int(limits[key]):
+                    limits[key] = default
     
     def _validate_required_config(self):
         """Validate that required configuration values are present."""
@@ -188,19 +339,37 @@ class Config:
             sys.exit(1)
     
     def _deep_merge(self, base: Dict, override: Dict):
-        """Deep merge override dict into base dict."""
-        for key, value in override.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._deep_merge(base[key], value)
-            else:
-                base[key] = value
+        """Deep merge override dict into base dict.
+        
+        Walks an explicit stack rather than recursing, so deep nesting can't
+        hit the recursion limit; pairs already merged are skipped, which also
+        stops self-referencing YAML anchors from looping forever. Empty or
+        identical overrides contribute nothing and are never pushed.
+        """
+        if override is base or not override:
+            return
+        stack = [(base, override)]
+        seen = set()
+        while stack:
+            b, o = stack.pop()
+            pair = (id(b), id(o))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            for key, value in o.items():
+                if isinstance(value, dict):
+                    current = b.get(key)
+                    if isinstance(current, dict):
+                        if value and value is not current:
+                            stack.append((current, value))
+                        continue
+                b[key] = value
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value."""
-        keys = key.split('.')
         value = self.config
         
-        for k in keys:
+        for k in _split_key(key):
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
@@ -210,10 +379,16 @@ class Config:
     
     def __getattr__(self, name: str) -> Any:
         """Allow attribute-style access to config."""
-        if name in self.config:
-            value = self.config[name]
+        config = self.__dict__.get('config', {})
+        if name in config:
+            value = config[name]
             if isinstance(value, dict):
-                return ConfigSection(value)
+                # Reuse the wrapper while the section dict is unchanged
+                sections = self.__dict__.setdefault('_sections', {})
+                section = sections.get(name)
+                if section is None or section._data is not value:
+                    section = sections[name] = ConfigSection(value)
+                return section
             return value
         raise AttributeError(f"Configuration has no attribute '{name}'")
 
@@ -221,19 +396,21 @@ class Config:
 class ConfigSection:
     """Wrapper for nested configuration sections."""
     
+    __slots__ = ('_data',)
+    
     def __init__(self, data: Dict):
+        # Non-dict data is normalized here so the accessors never re-check it
         self._data = data if isinstance(data, dict) else {}
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a value from this section."""
-        if not isinstance(self._data, dict):
-            return default
         return self._data.get(key, default)
     
     def __getattr__(self, name: str) -> Any:
         """Allow attribute-style access."""
-        if isinstance(self._data, dict) and name in self._data:
-            value = self._data[name]
+        data = self._data
+        if name in data:
+            value = data[name]
             if isinstance(value, dict):
                 return ConfigSection(value)
             return value
@@ -241,10 +418,8 @@ class ConfigSection:
     
     def __getitem__(self, key: str) -> Any:
         """Allow dictionary-style access."""
-        if isinstance(self._data, dict):
-            return self._data[key]
-        raise KeyError(key)
+        return self._data[key]
     
     def __contains__(self, key: str) -> bool:
         """Check if key exists in section."""
-        return isinstance(self._data, dict) and key in self._data
\ No newline at end of file
+        return key in self._data
\ No newline at end of file
@@ -3,19 +3,51 @@
 import subprocess
 import sys
 import os
+import shlex
 import threading
-import queue
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
 from .ai_analyzer import AIAnalyzer
 from .config import Config
 
 
+# Pipes are unbuffered, so each read returns whatever the child has written
+READ_CHUNK_SIZE = 65536
+
+
+def _needs_shell(args: List[str]) -> bool:
+    """Whether the shell has to interpret the command.
+    
+    Arguments with no characters the shell would treat specially can be
+    exec'd directly, saving a /bin/sh process per run. A leading VAR=value
+    assignment also needs the shell.
+    """
+    if '=' in args[0]:
+        return True
+    return any(shlex.quote(arg) != arg for arg in args)
+
+
 class CommandWrapper:
     """Wraps any command and provides AI analysis."""
     
     def __init__(self, config: Config):
         self.config = config
-        self.ai_analyzer = AIAnalyzer(config)
+        self._ai_analyzer = None
+    
+    @property
+    def ai_analyzer(self) -> AIAnalyzer:
+        """AI analyzer, created on first use.
+        
+        Runs that never analyze (--no-ai, piped output) skip building the
+        Bedrock client entirely.
+        """
+        if self._ai_analyzer is None:
+            self._ai_analyzer = AIAnalyzer(self.config)
+        return self._ai_analyzer
+    
+    @ai_analyzer.setter
+    def ai_analyzer(self, analyzer: AIAnalyzer):
+        self._ai_analyzer = analyzer
         
     def run(self, args: List[str]) -> int:
         """Execute command with AI analysis.
@@ -33,6 +65,7 @@ class CommandWrapper:
             print("")
             print("TERN flags:")
             print("  --no-ai       Skip AI analysis for this command")
+            print("  --batch       Run commands read from stdin, one per line")
             return 1
         
         skip_ai = '--no-ai' in args
@@ -41,6 +74,13 @@ class CommandWrapper:
         
         args = [arg for arg in args if arg not in ['--ai-verbose', '--ai-summary']]
         
+        # Only TERN flags were given (e.g. `tern --no-ai`): nothing to run
+        if not args:
+            return 0
+        
+        if args == ['--batch']:
+            return self.run_batch(sys.stdin, skip_ai=skip_ai)
+        
         command_str = ' '.join(args)
         
         stdout_is_piped = not sys.stdout.isatty()
@@ -58,94 +98,184 @@ class CommandWrapper:
         else:
             should_analyze = not skip_ai
         
-        stdout_queue = queue.Queue()
-        stderr_queue = queue.Queue()
+        return_code, output_lines, error_lines = self._execute(args, command_str)
+        
+        if should_analyze and (output_lines or error_lines):
+            self._analyze_and_display(command_str, output_lines, error_lines, return_code)
+        
+        return return_code
+    
+    
+    def run_batch(self, lines: Iterable[str], skip_ai: bool = False) -> int:
+        """Run several commands, then analyze them concurrently.
+        
+        Commands run one after another with live output, as with run(). The
+        AI analyses are then issued in parallel through a single analyzer so
+        they share one Bedrock client and its connection pool. Blank lines
+        and lines starting with '#' are ignored. Returns the exit code of the
+        first failing command, or 0.
+        """
+        commands = [line.strip() for line in lines]
+        commands = [c for c in commands if c and not c.startswith('#')]
+        
+        should_analyze = not skip_ai and sys.stdout.isatty()
+        if not skip_ai and not should_analyze:
+            print("", file=sys.stderr)
+            print("⚠️  TERN: Output is being piped - AI analysis disabled", file=sys.stderr)
+            print("", file=sys.stderr)
+        
+        results = []
+        exit_code = 0
+        for command_str in commands:
+            return_code, output_lines, error_lines = self._execute([command_str], command_str)
+            if return_code != 0 and exit_code == 0:
+                exit_code = return_code
+            if should_analyze and (output_lines or error_lines):
+                results.append((command_str, output_lines, error_lines, return_code))
         
+        if results:
+            # Built here, not in the workers: boto3.client() isn't thread-safe
+            analyzer = self.ai_analyzer
+            # Matches the Bedrock client's connection pool size
+            workers = min(len(results), 10)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                analyses = list(executor.map(lambda r: self._analyze(*r, analyzer=analyzer),
+                                             results))
+            for (command_str, _, _, _), analysis in zip(results, analyses):
+                self._display(analysis, command_str)
+        
+        return exit_code
+    
+    def _execute(self, args: List[str], command_str: str) -> Tuple[int, List[bytes], List[bytes]]:
+        """Run the command, streaming its output live while capturing it."""
         from collections import deque
         max_lines = self.config.get('limits.max_lines', 10000)
         output_lines = deque(maxlen=max_lines)
         error_lines = deque(maxlen=max_lines)
+        # Keep only the tail of each stream: at most max_lines lines and enough
+        # bytes for the AI's character limit (4 bytes covers any UTF-8 character)
+        output_budget = self.config.get('limits.output_chars', 15000) * 4
+        error_budget = self.config.get('limits.error_chars', 5000) * 4
         
         try:
-            process = subprocess.Popen(
-                command_str,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            process = None
+            if not _needs_shell(args):
+                try:
+                    process = subprocess.Popen(
+                        args,
+                        shell=False,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        bufsize=0
+                    )
+                except (FileNotFoundError, PermissionError):
+                    # Not on PATH (e.g. a shell builtin) or not executable - let
+                    # the shell resolve it and report the error with its exit code
+                    process = None
+            if process is None:
+                process = subprocess.Popen(
+                    command_str,
+                    shell=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    bufsize=0
+                )
         except Exception as e:
             print(f"Error running command: {e}", file=sys.stderr)
-            return 1
+            return 1, output_lines, error_lines
         
-        def read_output(pipe, queue_obj, storage_list, is_stderr=False):
+        def read_output(pipe, storage_list, stream, budget):
+            # Pass bytes through untouched; only decode when analyzing
+            out = getattr(stream, 'buffer', None)
+            stored = 0
+            partial = b''
+            
+            def keep(line):
+                nonlocal stored
+                if len(line) > budget:
+                    line = line[len(line) - budget:] if budget > 0 else b''
+                if len(storage_list) == storage_list.maxlen:
+                    stored -= len(storage_list[0])
+                storage_list.append(line)
+                stored += len(line)
+                while stored > budget and storage_list:
+                    stored -= len(storage_list.popleft())
+            
             try:
-                for line in iter(pipe.readline, ''):
-                    if line:
-                        line = line.rstrip('\n')
-                        queue_obj.put(line)
-                        storage_list.append(line)
-                        try:
-                            if is_stderr:
-                                print(line, file=sys.stderr, flush=True)
-                            else:
-                                print(line, flush=True)
-                        except (BrokenPipeError, IOError):
-                            break
+                while True:
+                    chunk = pipe.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    lines = (partial + chunk).split(b'\n')
+                    partial = lines.pop()
+                    for line in lines:
+                        keep(line + b'\n')
+                    if len(partial) > budget:
+                        partial = partial[len(partial) - budget:] if budget > 0 else b''
+                    try:
+                        if out is not None:
+                            out.write(chunk)
+                        else:
+                            stream.write(chunk.decode('utf-8', 'replace'))
+                        stream.flush()
+                    except (BrokenPipeError, IOError):
+                        break
             except Exception:
                 pass
             finally:
+                if partial:
+                    keep(partial)
                 pipe.close()
         
-        stdout_thread = threading.Thread(
-            target=read_output,
-            args=(process.stdout, stdout_queue, output_lines, False)
-        )
+        # stdout is drained on this thread; only stderr needs a helper
         stderr_thread = threading.Thread(
             target=read_output,
-            args=(process.stderr, stderr_queue, error_lines, True)
+            args=(process.stderr, error_lines, sys.stderr, error_budget)
         )
-        
-        stdout_thread.daemon = True
         stderr_thread.daemon = True
-        stdout_thread.start()
         stderr_thread.start()
         
+        read_output(process.stdout, output_lines, sys.stdout, output_budget)
+        
         return_code = process.wait()
-        stdout_thread.join()
         stderr_thread.join()
         
-        if should_analyze and (output_lines or error_lines):
-            self._analyze_and_display(command_str, output_lines, error_lines, return_code)
-        
-        return return_code
-    
+        return return_code, output_lines, error_lines
     
-    def _analyze_and_display(self, command: str, output_lines: List[str], 
-                            error_lines: List[str], return_code: int):
-        """Analyze the output and display AI insights."""
+    def _analyze(self, command: str, output_lines: List[bytes],
+                 error_lines: List[bytes], return_code: int,
+                 analyzer: Optional[AIAnalyzer] = None) -> Optional[str]:
+        """Run AI analysis on captured output, reporting any failure."""
         try:
-            full_output = '\n'.join(output_lines)
-            full_errors = '\n'.join(error_lines)
+            full_output = b''.join(output_lines).decode('utf-8', 'replace')
+            full_errors = b''.join(error_lines).decode('utf-8', 'replace')
             
-            analysis = self.ai_analyzer.analyze(
+            if analyzer is None:
+                analyzer = self.ai_analyzer
+            return analyzer.analyze(
                 command=command,
                 output=full_output,
                 errors=full_errors,
                 return_code=return_code
             )
-            
-            if analysis:
-                print("\n" + "="*60)
-                print("TERN AI Analysis:")
-                print("="*60)
-                print(analysis)
-                print("="*60 + "\n")
                 
         except Exception as e:
             print(f"\n❌ ERROR in TERN wrapper: {e}", file=sys.stderr)
             if self.config.get('debug', False):
                 import traceback
-                traceback.print_exc()
\ No newline at end of file
+                traceback.print_exc()
+            return None
+    
+    def _display(self, analysis: Optional[str], command: Optional[str] = None):
+        """Print an analysis in the TERN banner."""
+        if analysis:
+            print("\n" + "="*60)
+            print(f"TERN AI Analysis: {command}" if command else "TERN AI Analysis:")
+            print("="*60)
+            print(analysis)
+            print("="*60 + "\n")
+    
+    def _analyze_and_display(self, command: str, output_lines: List[bytes], 
+                            error_lines: List[bytes], return_code: int):
+        """Analyze the output and display AI insights."""
+        self._display(self._analyze(command, output_lines, error_lines, return_code))
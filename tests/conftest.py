@@ -0,0 +1,8 @@
+"""Put the in-tree sources on sys.path once per session."""
+
+import os
+import sys
+
+_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,25 @@
+"""Shared test helpers for running CommandWrapper without real processes."""
+
+from contextlib import contextmanager
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+
+@contextmanager
+def mocked_subprocess(exit_code=0):
+    """Patch Popen and Thread in tern.wrapper for a command that prints nothing.
+    
+    Yields (popen, commands): the Popen mock and a list that collects the
+    argument list of every Popen call, in order.
+    """
+    commands = []
+    
+    def popen(cmd, *args, **kwargs):
+        commands.append(cmd)
+        process = Mock(stdout=BytesIO(), stderr=BytesIO())
+        process.wait.return_value = exit_code
+        return process
+    
+    with patch('tern.wrapper.subprocess.Popen', side_effect=popen) as mock_popen, \
+            patch('tern.wrapper.threading.Thread'):
+        yield mock_popen, commands
@@ -1,52 +1,119 @@
 """Unit tests for the AIAnalyzer module."""
 
 import unittest
+import copy
 import json
 import sys
 import os
+import tempfile
 from io import StringIO
-from unittest.mock import Mock, patch, MagicMock
-from botocore.exceptions import ClientError
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+from unittest.mock import Mock, patch
 
+from tern import ai_analyzer as _ai_analyzer_module
 from tern.ai_analyzer import AIAnalyzer
 from tern.config import Config
 
 
+# Response payloads as bytes literals; _Body.read hands back the same object
+_CLAUDE_BODY = b'{"content":[{"text":"AI analysis result"}]}'
+_FULL_FLOW_BODY = b'{"content":[{"text":"Analysis: Everything looks good"}]}'
+_DEBUG_BODY = b'{"content":[{"text":"Debug analysis"}]}'
+_COMPLETION_BODY = b'{"completion":"Completion format result"}'
+_COMPLETIONS_BODY = b'{"completions":[{"text":"Completions format result"}]}'
+_TEXT_BODY = b'{"text":"Text format result"}'
+_UNKNOWN_BODY = b'{"unknown_field":"Unknown format"}'
+
+
+class _Body:
+    """Minimal stand-in for the streaming body; only read() is used."""
+    __slots__ = ('_data',)
+    
+    def __init__(self, data):
+        self._data = data
+    
+    def read(self):
+        return self._data
+
+
+def _mock_body(payload_bytes):
+    """Build an invoke_model response whose body reads as payload_bytes."""
+    return {'body': _Body(payload_bytes)}
+
+
 class TestAIAnalyzer(unittest.TestCase):
     """Test cases for the AIAnalyzer class."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the base config once; it points at a config file that doesn't exist."""
+        temp_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls._base_config = Config(config_path=os.path.join(temp_dir.name, '.tern.conf'),
+                                  require_config_file=False)
+        cls._boto_patcher = patch.object(_ai_analyzer_module.boto3, 'client')
+        cls._mock_boto = cls._boto_patcher.start()
+        cls.addClassCleanup(cls._boto_patcher.stop)
+        
+        from botocore.exceptions import ClientError
+        cls.ClientError = ClientError
+        
+        for payload in (_CLAUDE_BODY, _FULL_FLOW_BODY, _DEBUG_BODY, _COMPLETION_BODY,
+                        _COMPLETIONS_BODY, _TEXT_BODY, _UNKNOWN_BODY):
+            json.loads(payload)
+        
+        # Responses for test_different_response_formats; _Body can be read repeatedly
+        cls._FORMAT_CASES = (
+            (_mock_body(_CLAUDE_BODY), 'AI analysis result'),
+            (_mock_body(_COMPLETION_BODY), 'Completion format result'),
+            (_mock_body(_COMPLETIONS_BODY), 'Completions format result'),
+            (_mock_body(_TEXT_BODY), 'Text format result'),
+        )
+        cls._UNKNOWN_RESPONSE = _mock_body(_UNKNOWN_BODY)
+        
+        # Shared by tests that don't change the config; setUp rebinds its client
+        cls._analyzer = AIAnalyzer(cls._base_config)
+        
+        cls._LONG_X = 'x' * 20000
+        cls._LONG_Y = 'y' * 10000
+        # Fenced blocks holding exactly the default limits' worth of each
+        cls._X_BLOCK = '```\n' + cls._LONG_X[-15000:] + '\n```'
+        cls._Y_BLOCK = '```\n' + cls._LONG_Y[-5000:] + '\n```'
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.config = Config(require_config_file=False)
+        self.config = copy.copy(self._base_config)
+        self.config.config = copy.deepcopy(self._base_config.config)
         self.mock_bedrock_client = Mock()
+        self._mock_boto.reset_mock(return_value=True, side_effect=True)
+        self._mock_boto.return_value = self.mock_bedrock_client
+        self._analyzer.bedrock_client = self.mock_bedrock_client
+    
+    def _bare_analyzer(self):
+        """AIAnalyzer on self.config without running __init__ (no client build)."""
+        analyzer = AIAnalyzer.__new__(AIAnalyzer)
+        analyzer.config = self.config
+        analyzer.bedrock_client = self.mock_bedrock_client
+        return analyzer
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_initialization(self, mock_boto_client):
+    def test_initialization(self):
         """Test AIAnalyzer initialization."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        
         analyzer = AIAnalyzer(self.config)
         
-        mock_boto_client.assert_called_once()
+        self._mock_boto.assert_called_once()
         self.assertEqual(analyzer.bedrock_client, self.mock_bedrock_client)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_initialization_with_region(self, mock_boto_client):
+    def test_initialization_with_region(self):
         """Test AIAnalyzer initialization with specific region."""
         self.config.config['bedrock']['region'] = 'us-east-1'
-        mock_boto_client.return_value = self.mock_bedrock_client
         
         analyzer = AIAnalyzer(self.config)
         
-        call_args = mock_boto_client.call_args
+        call_args = self._mock_boto.call_args
         self.assertEqual(call_args[1]['region_name'], 'us-east-1')
     
     def test_build_prompt(self):
         """Test prompt building."""
-        analyzer = AIAnalyzer(self.config)
-        analyzer.bedrock_client = self.mock_bedrock_client
+        analyzer = self._analyzer
         
         prompt = analyzer._build_prompt(
             command='terraform plan',
@@ -60,40 +127,40 @@ class TestAIAnalyzer(unittest.TestCase):
         self.assertIn('Warning: deprecated feature', prompt)
         self.assertIn('Return Code: 0', prompt)
     
+    def test_build_prompt_with_braces_in_output(self):
+        """Test that template placeholders in command output are not expanded."""
+        analyzer = self._analyzer
+        
+        prompt = analyzer._build_prompt(
+            command='echo "{command}"',
+            output='{"resource": {"out": "{err}"}}',
+            errors='',
+            return_code=0
+        )
+        
+        self.assertIn('`echo "{command}"`', prompt)
+        self.assertIn('{"resource": {"out": "{err}"}}', prompt)
+        self.assertIn('(no errors)', prompt)
+    
     def test_build_prompt_truncation(self):
         """Test that long outputs are truncated."""
-        analyzer = AIAnalyzer(self.config)
-        analyzer.bedrock_client = self.mock_bedrock_client
-        
-        long_output = 'x' * 20000
-        long_errors = 'y' * 10000
+        analyzer = self._analyzer
         
         prompt = analyzer._build_prompt(
             command='apply',
-            output=long_output,
-            errors=long_errors,
+            output=self._LONG_X,
+            errors=self._LONG_Y,
             return_code=1
         )
         
-        self.assertIn('x' * 15000, prompt)
-        self.assertNotIn('x' * 15001, prompt)
-        self.assertIn('y' * 5000, prompt)
-        self.assertNotIn('y' * 5001, prompt)
+        self.assertIn(self._X_BLOCK, prompt)
+        self.assertIn(self._Y_BLOCK, prompt)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_invoke_model_claude_format(self, mock_boto_client):
+    def test_invoke_model_claude_format(self):
         """Test model invocation with Claude format."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
+        analyzer = self._analyzer
         
-        mock_response = {
-            'body': MagicMock()
-        }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'AI analysis result'}]
-        }).encode('utf-8')
-        
-        self.mock_bedrock_client.invoke_model.return_value = mock_response
+        self.mock_bedrock_client.invoke_model.return_value = _mock_body(_CLAUDE_BODY)
         
         result = analyzer._invoke_model('Test prompt')
         
@@ -101,24 +168,37 @@ class TestAIAnalyzer(unittest.TestCase):
         call_args = self.mock_bedrock_client.invoke_model.call_args[1]
         self.assertEqual(call_args['modelId'], 'test-model-id')
         
-        body = json.loads(call_args['body'])
-        self.assertIn('prompt', body)
-        self.assertEqual(body['prompt'], 'Test prompt')
-        self.assertIn('max_tokens', body)
-        self.assertIn('temperature', body)
+        raw = call_args['body']
+        self.assertIsInstance(raw, bytes)
+        # Only a few fields matter here, so match the raw bytes rather than parse
+        self.assertRegex(raw, rb'"prompt":\s*"Test prompt"')
+        self.assertIn(b'"max_tokens"', raw)
+        self.assertIn(b'"temperature"', raw)
         
         self.assertEqual(result, 'AI analysis result')
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_invoke_model_error_handling(self, mock_boto_client):
+    def test_invoke_model_anthropic_messages_format(self):
+        """Test that Anthropic model IDs get a Messages API request body."""
+        self.config.config['bedrock']['model_id'] = 'us.Anthropic.Claude-sonnet-4-20250514-v1:0'
+        analyzer = self._bare_analyzer()
+        
+        self.mock_bedrock_client.invoke_model.return_value = _mock_body(_CLAUDE_BODY)
+        
+        analyzer._invoke_model('Test prompt')
+        
+        body = json.loads(self.mock_bedrock_client.invoke_model.call_args[1]['body'])
+        self.assertEqual(body['anthropic_version'], 'bedrock-2023-05-31')
+        self.assertEqual(body['messages'], [{'role': 'user', 'content': 'Test prompt'}])
+        self.assertNotIn('prompt', body)
+    
+    def test_invoke_model_error_handling(self):
         """Test error handling in model invocation."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
+        analyzer = self._analyzer
         
         error_response = {'Error': {'Code': 'AccessDeniedException'}}
-        self.mock_bedrock_client.invoke_model.side_effect = ClientError(error_response, 'invoke_model')
+        self.mock_bedrock_client.invoke_model.side_effect = self.ClientError(error_response, 'invoke_model')
         
-        with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+        with patch.object(sys, 'stderr', new_callable=StringIO) as mock_stderr:
             result = analyzer._invoke_model('Test prompt')
             self.assertIsNone(result)
             error_output = mock_stderr.getvalue()
@@ -126,28 +206,19 @@ class TestAIAnalyzer(unittest.TestCase):
             self.assertIn('AccessDeniedException', error_output)
         
         error_response = {'Error': {'Code': 'ResourceNotFoundException'}}
-        self.mock_bedrock_client.invoke_model.side_effect = ClientError(error_response, 'invoke_model')
+        self.mock_bedrock_client.invoke_model.side_effect = self.ClientError(error_response, 'invoke_model')
         
-        with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+        with patch.object(sys, 'stderr', new_callable=StringIO) as mock_stderr:
             result = analyzer._invoke_model('Test prompt')
             self.assertIsNone(result)
             error_output = mock_stderr.getvalue()
             self.assertIn('not found', error_output)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_analyze_full_flow(self, mock_boto_client):
+    def test_analyze_full_flow(self):
         """Test the complete analyze flow."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
-        
-        mock_response = {
-            'body': MagicMock()
-        }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'Analysis: Everything looks good'}]
-        }).encode('utf-8')
+        analyzer = self._analyzer
         
-        self.mock_bedrock_client.invoke_model.return_value = mock_response
+        self.mock_bedrock_client.invoke_model = lambda **kwargs: _mock_body(_FULL_FLOW_BODY)
         
         result = analyzer.analyze(
             command='plan',
@@ -158,41 +229,35 @@ class TestAIAnalyzer(unittest.TestCase):
         
         self.assertEqual(result, 'Analysis: Everything looks good')
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_analyze_with_debug_mode(self, mock_boto_client):
+    def test_analyze_with_debug_mode(self):
         """Test analyze with debug mode enabled."""
         self.config.config['debug'] = True
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
+        analyzer = self._bare_analyzer()
         
-        mock_response = {
-            'body': MagicMock()
-        }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'Debug analysis'}]
-        }).encode('utf-8')
+        self.mock_bedrock_client.invoke_model = lambda **kwargs: _mock_body(_DEBUG_BODY)
         
-        self.mock_bedrock_client.invoke_model.return_value = mock_response
+        saw_debug = []
+        def _spy(msg='', *args, **kwargs):
+            saw_debug.append('[DEBUG]' in str(msg))
         
-        with patch('builtins.print') as mock_print:
+        with patch('builtins.print', side_effect=_spy):
             result = analyzer.analyze(
                 command='apply',
                 output='Applying changes',
                 errors='',
                 return_code=0
             )
-            
-            debug_calls = [call[0][0] for call in mock_print.call_args_list]
-            self.assertTrue(any('[DEBUG]' in msg for msg in debug_calls))
-            self.assertEqual(result, 'Debug analysis')
+        
+        self.assertTrue(any(saw_debug))
+        self.assertEqual(result, 'Debug analysis')
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_analyze_exception_handling(self, mock_boto_client):
+    def test_analyze_exception_handling(self):
         """Test exception handling in analyze method."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
+        analyzer = self._analyzer
         
-        self.mock_bedrock_client.invoke_model.side_effect = Exception('Test error')
+        def invoke_model(**kwargs):
+            raise Exception('Test error')
+        self.mock_bedrock_client.invoke_model = invoke_model
         
         result = analyzer.analyze(
             command='destroy',
@@ -203,43 +268,18 @@ class TestAIAnalyzer(unittest.TestCase):
         
         self.assertIsNone(result)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_different_response_formats(self, mock_boto_client):
+    def test_different_response_formats(self):
         """Test handling of different AI model response formats."""
-        mock_boto_client.return_value = self.mock_bedrock_client
-        analyzer = AIAnalyzer(self.config)
-        
-        mock_response = {
-            'body': MagicMock()
-        }
-        mock_response['body'].read.return_value = json.dumps({
-            'completion': 'Completion format result'
-        }).encode('utf-8')
-        
-        self.mock_bedrock_client.invoke_model.return_value = mock_response
-        result = analyzer._invoke_model('Test')
-        self.assertEqual(result, 'Completion format result')
-        
-        mock_response['body'].read.return_value = json.dumps({
-            'completions': [{'text': 'Completions format result'}]
-        }).encode('utf-8')
-        
-        result = analyzer._invoke_model('Test')
-        self.assertEqual(result, 'Completions format result')
-        
-        mock_response['body'].read.return_value = json.dumps({
-            'text': 'Text format result'
-        }).encode('utf-8')
+        analyzer = self._analyzer
         
-        result = analyzer._invoke_model('Test')
-        self.assertEqual(result, 'Text format result')
+        responses = iter([response for response, _ in self._FORMAT_CASES] + [self._UNKNOWN_RESPONSE])
+        self.mock_bedrock_client.invoke_model = lambda **kwargs: next(responses)
         
-        mock_response['body'].read.return_value = json.dumps({
-            'unknown_field': 'Unknown format'
-        }).encode('utf-8')
+        for _, expected in self._FORMAT_CASES:
+            with self.subTest(expected=expected):
+                self.assertEqual(analyzer._invoke_model('Test'), expected)
         
-        result = analyzer._invoke_model('Test')
-        self.assertIn('unknown_field', result)
+        self.assertIn('unknown_field', analyzer._invoke_model('Test'))
 
 
 if __name__ == '__main__':
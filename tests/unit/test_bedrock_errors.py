@@ -1,131 +1,130 @@
 """Test error handling for AWS Bedrock failures."""
 
 import unittest
+import copy
+import os
+import tempfile
+import types
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import json
-from io import StringIO
-from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError
+from io import BytesIO, StringIO
 
+from tern import ai_analyzer as _ai_analyzer_module
 from tern.ai_analyzer import AIAnalyzer
 from tern.wrapper import CommandWrapper
 from tern.config import Config
 
 
+# Substrings each error report must contain, interned once at import
+_EXPECTED = {name: tuple(sys.intern(text) for text in texts) for name, texts in {
+    'access_denied': ('AWS Bedrock Error: AccessDeniedException',
+                      'Your AWS credentials are configured',
+                      'bedrock:InvokeModel permission'),
+    'expired_token': ('AWS Bedrock Error: ExpiredTokenException',
+                      'AWS credentials have expired',
+                      'aws sso login'),
+    'model_not_found': ('AWS Bedrock Error: ResourceNotFoundException',
+                        'not found in region',
+                        '~/.tern.conf'),
+    'throttling': ('AWS Bedrock Error: ThrottlingException',
+                   'Request throttled',
+                   'wait a moment'),
+    'validation': ('AWS Bedrock Error: ValidationException',
+                   'Invalid request',
+                   'max_tokens must be less than 4096'),
+    'connection': ('Connection Error',
+                   'Unable to reach AWS Bedrock',
+                   'internet connection'),
+    'timeout': ('Timeout',
+                'took too long',
+                'AI analysis has been skipped'),
+    'no_credentials': ('Unexpected error',
+                       'credentials',
+                       'aws configure'),
+    'no_region': ('Failed to initialize AWS Bedrock client',
+                  'No AWS region configured'),
+}.items()}
+
+
 class TestBedrockErrorHandling(unittest.TestCase):
     """Test that Bedrock errors are reported clearly to users."""
     
-    def setUp(self):
-        self.config = Config(require_config_file=False)
-        self.config.config['bedrock'] = {
+    @classmethod
+    def setUpClass(cls):
+        temp_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls._base_config = Config(config_path=os.path.join(temp_dir.name, '.tern.conf'),
+                                  require_config_file=False)
+        cls._base_config.config['bedrock'] = {
             'region': 'us-east-1',
             'model_id': 'anthropic.claude-3-sonnet-20240229-v1:0',
             'timeout': 5
         }
-    
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_access_denied_error(self, mock_stderr, mock_boto_client):
-        """Test clear error message for access denied."""
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        error_response = {
-            'Error': {
-                'Code': 'AccessDeniedException',
-                'Message': 'User is not authorized to perform bedrock:InvokeModel'
-            }
-        }
-        mock_bedrock.invoke_model.side_effect = ClientError(error_response, 'InvokeModel')
-        
-        analyzer = AIAnalyzer(self.config)
-        result = analyzer.analyze('ls', 'file1\nfile2', '', 0)
+        cls._boto_patcher = patch.object(_ai_analyzer_module.boto3, 'client')
+        cls._mock_boto = cls._boto_patcher.start()
+        cls.addClassCleanup(cls._boto_patcher.stop)
         
-        self.assertIsNone(result)
+        from botocore.exceptions import ClientError
+        cls.ClientError = ClientError
         
-        error_output = mock_stderr.getvalue()
-        self.assertIn('AWS Bedrock Error: AccessDeniedException', error_output)
-        self.assertIn('Your AWS credentials are configured', error_output)
-        self.assertIn('bedrock:InvokeModel permission', error_output)
+        # One buffer for the class; pytest swaps sys.stderr per test, so it
+        # is installed in setUp rather than patched here
+        cls._stderr = StringIO()
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_expired_credentials_error(self, mock_stderr, mock_boto_client):
-        """Test clear error message for expired credentials."""
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        error_response = {
-            'Error': {
-                'Code': 'ExpiredTokenException',
-                'Message': 'The security token included in the request is expired'
-            }
-        }
-        mock_bedrock.invoke_model.side_effect = ClientError(error_response, 'InvokeModel')
-        
-        analyzer = AIAnalyzer(self.config)
-        result = analyzer.analyze('ls', 'output', '', 0)
-        
-        self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('AWS Bedrock Error: ExpiredTokenException', error_output)
-        self.assertIn('AWS credentials have expired', error_output)
-        self.assertIn('aws sso login', error_output)
+    def setUp(self):
+        self.config = copy.copy(self._base_config)
+        self.config.config = copy.deepcopy(self._base_config.config)
+        self._mock_boto.reset_mock(return_value=True, side_effect=True)
+        self._stderr.seek(0)
+        self._stderr.truncate(0)
+        self.addCleanup(setattr, sys, 'stderr', sys.stderr)
+        sys.stderr = self._stderr
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_model_not_found_error(self, mock_stderr, mock_boto_client):
-        """Test clear error message when model is not found."""
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        error_response = {
-            'Error': {
-                'Code': 'ResourceNotFoundException',
-                'Message': 'Could not find model'
-            }
-        }
-        mock_bedrock.invoke_model.side_effect = ClientError(error_response, 'InvokeModel')
-        
-        analyzer = AIAnalyzer(self.config)
-        result = analyzer.analyze('ls', 'output', '', 0)
-        
-        self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('AWS Bedrock Error: ResourceNotFoundException', error_output)
-        self.assertIn('not found in region', error_output)
-        self.assertIn('~/.tern.conf', error_output)
+    def _assert_all_in(self, haystack, needles):
+        for needle in needles:
+            self.assertIn(needle, haystack)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_throttling_error(self, mock_stderr, mock_boto_client):
-        """Test clear error message for throttling."""
+    def test_client_errors(self):
+        """Test clear error messages for Bedrock ClientError codes."""
+        cases = [
+            ('AccessDeniedException',
+             'User is not authorized to perform bedrock:InvokeModel',
+             _EXPECTED['access_denied']),
+            ('ExpiredTokenException',
+             'The security token included in the request is expired',
+             _EXPECTED['expired_token']),
+            ('ResourceNotFoundException',
+             'Could not find model',
+             _EXPECTED['model_not_found']),
+            ('ThrottlingException',
+             'Rate exceeded',
+             _EXPECTED['throttling']),
+            ('ValidationException',
+             'Invalid model input: max_tokens must be less than 4096',
+             _EXPECTED['validation']),
+        ]
         mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        error_response = {
-            'Error': {
-                'Code': 'ThrottlingException',
-                'Message': 'Rate exceeded'
-            }
-        }
-        mock_bedrock.invoke_model.side_effect = ClientError(error_response, 'InvokeModel')
+        self._mock_boto.return_value = mock_bedrock
+        mock_bedrock.invoke_model.side_effect = [
+            self.ClientError({'Error': {'Code': code, 'Message': message}}, 'InvokeModel')
+            for code, message, _ in cases
+        ]
         
         analyzer = AIAnalyzer(self.config)
-        result = analyzer.analyze('ls', 'output', '', 0)
-        
-        self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('AWS Bedrock Error: ThrottlingException', error_output)
-        self.assertIn('Request throttled', error_output)
-        self.assertIn('wait a moment', error_output)
+        for code, _, expected in cases:
+            with self.subTest(code=code):
+                self._stderr.seek(0)
+                self._stderr.truncate(0)
+                result = analyzer.analyze('ls', 'output', '', 0)
+                
+                self.assertIsNone(result)
+                self._assert_all_in(self._stderr.getvalue(), expected)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_connection_error(self, mock_stderr, mock_boto_client):
+    def test_connection_error(self):
         """Test clear error message for connection errors."""
         mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
+        self._mock_boto.return_value = mock_bedrock
         
         mock_bedrock.invoke_model.side_effect = ConnectionError("Unable to connect")
         
@@ -133,17 +132,12 @@ class TestBedrockErrorHandling(unittest.TestCase):
         result = analyzer.analyze('ls', 'output', '', 0)
         
         self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('Connection Error', error_output)
-        self.assertIn('Unable to reach AWS Bedrock', error_output)
-        self.assertIn('internet connection', error_output)
+        self._assert_all_in(self._stderr.getvalue(), _EXPECTED['connection'])
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_timeout_error(self, mock_stderr, mock_boto_client):
+    def test_timeout_error(self):
         """Test clear error message for timeout."""
         mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
+        self._mock_boto.return_value = mock_bedrock
         
         mock_bedrock.invoke_model.side_effect = TimeoutError("Request timed out")
         
@@ -151,17 +145,12 @@ class TestBedrockErrorHandling(unittest.TestCase):
         result = analyzer.analyze('ls', 'output', '', 0)
         
         self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('Timeout', error_output)
-        self.assertIn('took too long', error_output)
-        self.assertIn('AI analysis has been skipped', error_output)
+        self._assert_all_in(self._stderr.getvalue(), _EXPECTED['timeout'])
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_credentials_not_configured_error(self, mock_stderr, mock_boto_client):
+    def test_credentials_not_configured_error(self):
         """Test clear error message when credentials are not configured."""
         mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
+        self._mock_boto.return_value = mock_bedrock
         
         mock_bedrock.invoke_model.side_effect = Exception("Unable to locate credentials")
         
@@ -169,14 +158,9 @@ class TestBedrockErrorHandling(unittest.TestCase):
         result = analyzer.analyze('ls', 'output', '', 0)
         
         self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('Unexpected error', error_output)
-        self.assertIn('credentials', error_output)
-        self.assertIn('aws configure', error_output)
+        self._assert_all_in(self._stderr.getvalue(), _EXPECTED['no_credentials'])
     
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_no_region_configured(self, mock_stderr, mock_boto_client):
+    def test_no_region_configured(self):
         """Test clear error message when no region is configured."""
         self.config.config['bedrock'] = {'model_id': 'test-model'}
         
@@ -184,23 +168,19 @@ class TestBedrockErrorHandling(unittest.TestCase):
         
         self.assertIsNone(analyzer.bedrock_client)
         
-        error_output = mock_stderr.getvalue()
-        self.assertIn('Failed to initialize AWS Bedrock client', error_output)
-        self.assertIn('No AWS region configured', error_output)
+        self._assert_all_in(self._stderr.getvalue(), _EXPECTED['no_region'])
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_no_model_id_configured(self, mock_boto_client):
+    def test_no_model_id_configured(self):
         """Test clear error message when no model_id is configured."""
         self.config.config['bedrock'] = {'region': 'us-east-1'}
         
         mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
+        self._mock_boto.return_value = mock_bedrock
         
-        with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
-            analyzer = AIAnalyzer(self.config)
-            result = analyzer.analyze('ls', 'output', '', 0)
-            
-            self.assertIsNone(result)
+        analyzer = AIAnalyzer(self.config)
+        result = analyzer.analyze('ls', 'output', '', 0)
+        
+        self.assertIsNone(result)
     
     def test_wrapper_reports_ai_errors(self):
         """Test that wrapper continues to work when AI analyzer fails."""
@@ -208,20 +188,15 @@ class TestBedrockErrorHandling(unittest.TestCase):
         with patch('tern.wrapper.subprocess.Popen') as mock_popen:
             mock_process = Mock()
             mock_process.wait.return_value = 0
-            mock_process.stdout = Mock()
-            mock_process.stderr = Mock()
-            mock_process.stdout.readline = Mock(side_effect=['output\n', ''])
-            mock_process.stderr.readline = Mock(return_value='')
+            mock_process.stdout = BytesIO(b'output\n')
+            mock_process.stderr = BytesIO()
             mock_popen.return_value = mock_process
             
-            def mock_thread_init(target=None, args=None, **kwargs):
-                thread = Mock()
-                thread.daemon = True
-                thread.start = Mock()
-                thread.join = Mock()
+            def mock_thread_init(target=None, args=(), **kwargs):
                 if target:
                     target(*args)
-                return thread
+                return types.SimpleNamespace(daemon=True, start=lambda: None,
+                                             join=lambda *a, **k: None)
             
             with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
                 with patch('tern.wrapper.AIAnalyzer') as mock_ai_analyzer_class:
@@ -239,35 +214,10 @@ class TestBedrockErrorHandling(unittest.TestCase):
                             
                             mock_ai_instance.analyze.assert_called_once_with(
                                 command='echo test',
-                                output='output',
+                                output='output\n',
                                 errors='',
                                 return_code=0
                             )
-                            
-    
-    @patch('tern.ai_analyzer.boto3.client')
-    @patch('sys.stderr', new_callable=StringIO)
-    def test_validation_error(self, mock_stderr, mock_boto_client):
-        """Test clear error message for validation errors."""
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        error_response = {
-            'Error': {
-                'Code': 'ValidationException',
-                'Message': 'Invalid model input: max_tokens must be less than 4096'
-            }
-        }
-        mock_bedrock.invoke_model.side_effect = ClientError(error_response, 'InvokeModel')
-        
-        analyzer = AIAnalyzer(self.config)
-        result = analyzer.analyze('ls', 'output', '', 0)
-        
-        self.assertIsNone(result)
-        error_output = mock_stderr.getvalue()
-        self.assertIn('AWS Bedrock Error: ValidationException', error_output)
-        self.assertIn('Invalid request', error_output)
-        self.assertIn('max_tokens must be less than 4096', error_output)
 
 
 if __name__ == '__main__':
@@ -1,149 +1,113 @@
 """Unit tests for the CLI module."""
 
 import unittest
-import sys
-import os
-from unittest.mock import Mock, patch, MagicMock
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+from unittest.mock import DEFAULT, Mock, patch, MagicMock
 
 from tern.cli import main
 
 
+# argv lists for main(); it only slices them, so tests can share them
+_ARGV_PLAN = ['tern', 'plan']
+_ARGV_APPLY_AUTO_APPROVE = ['tern', 'apply', '-auto-approve', 'main.tf']
+_ARGV_VALIDATE = ['tern', 'validate']
+_ARGV_BARE = ['tern']
+_ARGV_PLAN_NO_AI = ['tern', 'plan', '--no-ai']
+_ARGV_APPLY_TARGETED = ['tern', 'apply', '-target=module.vpc', '-var', 'env=prod']
+
+
 class TestCLI(unittest.TestCase):
     """Test cases for the CLI module."""
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_basic_command(self, mock_config_class, mock_wrapper_class, mock_exit):
-        """Test main function with basic command."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
+    @classmethod
+    def setUpClass(cls):
+        cli_patcher = patch.multiple('tern.cli', Config=DEFAULT, CommandWrapper=DEFAULT)
+        mocks = cli_patcher.start()
+        cls.addClassCleanup(cli_patcher.stop)
+        cls.mock_config_class = mocks['Config']
+        cls.mock_wrapper_class = mocks['CommandWrapper']
+        
+        exit_patcher = patch('tern.cli.sys.exit')
+        cls.mock_exit = exit_patcher.start()
+        cls.addClassCleanup(exit_patcher.stop)
+    
+    def setUp(self):
+        """Reset the class-level patches and wire up fresh instances."""
+        for mock in (self.mock_config_class, self.mock_wrapper_class, self.mock_exit):
+            mock.reset_mock(return_value=True, side_effect=True)
         
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 0
-        mock_wrapper_class.return_value = mock_wrapper
+        self.mock_config = Mock()
+        self.mock_config_class.return_value = self.mock_config
         
-        with patch('tern.cli.sys.argv', ['tern', 'plan']):
+        self.mock_wrapper = Mock()
+        self.mock_wrapper.run.return_value = 0
+        self.mock_wrapper_class.return_value = self.mock_wrapper
+    
+    def test_main_basic_command(self):
+        """Test main function with basic command."""
+        with patch('tern.cli.sys.argv', _ARGV_PLAN):
             main()
         
-        mock_config_class.assert_called_once()
-        mock_wrapper_class.assert_called_once_with(mock_config)
-        mock_wrapper.run.assert_called_once_with(['plan'])
-        mock_exit.assert_called_once_with(0)
+        self.mock_config_class.assert_called_once()
+        self.mock_wrapper_class.assert_called_once_with(self.mock_config)
+        self.mock_wrapper.run.assert_called_once_with(['plan'])
+        self.mock_exit.assert_called_once_with(0)
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_with_multiple_args(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_with_multiple_args(self):
         """Test main function with multiple arguments."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
-        
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 0
-        mock_wrapper_class.return_value = mock_wrapper
-        
-        with patch('tern.cli.sys.argv', ['tern', 'apply', '-auto-approve', 'main.tf']):
+        with patch('tern.cli.sys.argv', _ARGV_APPLY_AUTO_APPROVE):
             main()
         
-        mock_wrapper.run.assert_called_once_with(['apply', '-auto-approve', 'main.tf'])
-        mock_exit.assert_called_once_with(0)
+        self.mock_wrapper.run.assert_called_once_with(['apply', '-auto-approve', 'main.tf'])
+        self.mock_exit.assert_called_once_with(0)
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_with_error_exit_code(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_with_error_exit_code(self):
         """Test main function propagates error exit codes."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
-        
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 1
-        mock_wrapper_class.return_value = mock_wrapper
+        self.mock_wrapper.run.return_value = 1
         
-        with patch('tern.cli.sys.argv', ['tern', 'validate']):
+        with patch('tern.cli.sys.argv', _ARGV_VALIDATE):
             main()
         
-        mock_wrapper.run.assert_called_once_with(['validate'])
-        mock_exit.assert_called_once_with(1)
+        self.mock_wrapper.run.assert_called_once_with(['validate'])
+        self.mock_exit.assert_called_once_with(1)
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_with_no_arguments(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_with_no_arguments(self):
         """Test main function with no arguments."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
-        
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 0
-        mock_wrapper_class.return_value = mock_wrapper
-        
-        with patch('tern.cli.sys.argv', ['tern']):
+        with patch('tern.cli.sys.argv', _ARGV_BARE):
             main()
         
-        mock_wrapper.run.assert_called_once_with([])
-        mock_exit.assert_called_once_with(0)
+        self.mock_wrapper.run.assert_called_once_with([])
+        self.mock_exit.assert_called_once_with(0)
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_with_tern_flags(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_with_tern_flags(self):
         """Test main function with TERN-specific flags."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
-        
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 0
-        mock_wrapper_class.return_value = mock_wrapper
-        
-        with patch('tern.cli.sys.argv', ['tern', 'plan', '--no-ai']):
+        with patch('tern.cli.sys.argv', _ARGV_PLAN_NO_AI):
             main()
         
-        mock_wrapper.run.assert_called_once_with(['plan', '--no-ai'])
-        mock_exit.assert_called_once_with(0)
+        self.mock_wrapper.run.assert_called_once_with(['plan', '--no-ai'])
+        self.mock_exit.assert_called_once_with(0)
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_exception_handling(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_exception_handling(self):
         """Test main function handles exceptions gracefully."""
-        mock_config = Mock()
-        mock_config_class.return_value = mock_config
+        self.mock_wrapper.run.side_effect = Exception("Unexpected error")
         
-        mock_wrapper = Mock()
-        mock_wrapper.run.side_effect = Exception("Unexpected error")
-        mock_wrapper_class.return_value = mock_wrapper
-        
-        with patch('tern.cli.sys.argv', ['tern', 'plan']):
+        with patch('tern.cli.sys.argv', _ARGV_PLAN):
             with self.assertRaises(Exception) as context:
                 main()
             
             self.assertEqual(str(context.exception), "Unexpected error")
     
-    @patch('tern.cli.sys.exit')
-    @patch('tern.cli.CommandWrapper')
-    @patch('tern.cli.Config')
-    def test_main_integration_flow(self, mock_config_class, mock_wrapper_class, mock_exit):
+    def test_main_integration_flow(self):
         """Test the complete integration flow of main function."""
-        mock_config = Mock()
-        mock_config.bedrock = {'model_id': 'test-model'}
-        mock_config.analysis = {'verbosity': 'summary'}
-        mock_config_class.return_value = mock_config
-        
-        mock_wrapper = Mock()
-        mock_wrapper.run.return_value = 0
-        mock_wrapper_class.return_value = mock_wrapper
+        self.mock_config.bedrock = {'model_id': 'test-model'}
+        self.mock_config.analysis = {'verbosity': 'summary'}
         
-        with patch('tern.cli.sys.argv', ['tern', 'apply', '-target=module.vpc', '-var', 'env=prod']):
+        with patch('tern.cli.sys.argv', _ARGV_APPLY_TARGETED):
             main()
         
-        mock_config_class.assert_called_once()
-        mock_wrapper_class.assert_called_once_with(mock_config)
-        mock_wrapper.run.assert_called_once_with(['apply', '-target=module.vpc', '-var', 'env=prod'])
-        mock_exit.assert_called_once_with(0)
+        self.mock_config_class.assert_called_once()
+        self.mock_wrapper_class.assert_called_once_with(self.mock_config)
+        self.mock_wrapper.run.assert_called_once_with(['apply', '-target=module.vpc', '-var', 'env=prod'])
+        self.mock_exit.assert_called_once_with(0)
 
 
 if __name__ == '__main__':
@@ -3,59 +3,56 @@
 import unittest
 import tempfile
 import os
+import sys
 import json
 from pathlib import Path
 from unittest.mock import patch, mock_open
-import yaml
-import sys
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
 from tern.config import Config, ConfigSection
 
 
+_CFG_YAML = b"bedrock:\n  model_id: test-model-id\n  region: us-west-2\n  timeout: 60\ndebug: true\n"
+
+
 class TestConfig(unittest.TestCase):
     """Test cases for the Config class."""
     
+    @classmethod
+    def setUpClass(cls):
+        cls._root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._root.cleanup)
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.original_cwd = os.getcwd()
-    
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        self.temp_dir.cleanup()
+        self.temp_dir = os.path.join(self._root.name, self.id().split('.')[-1])
+        os.makedirs(self.temp_dir)
     
     def test_default_config_initialization(self):
         """Test that Config initializes with default values."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config = Config(require_config_file=False)
-                
-                self.assertEqual(config.get('bedrock.model_id'), 'test-model-id')
-                self.assertEqual(config.get('bedrock.region'), 'us-east-1')
-                self.assertEqual(config.get('bedrock.timeout'), 180)
-                self.assertFalse(config.get('debug', False))
-        finally:
-            os.chdir(original_cwd)
+        config = Config(config_path=os.path.join(self.temp_dir, 'nonexistent.conf'),
+                        require_config_file=False)
+        
+        self.assertEqual(config.get('bedrock.model_id'), 'test-model-id')
+        self.assertEqual(config.get('bedrock.region'), 'us-east-1')
+        self.assertEqual(config.get('bedrock.timeout'), 180)
+        self.assertFalse(config.get('debug', False))
+    
+    def test_defaults_not_shared_between_instances(self):
+        """Test that mutating one Config does not leak into DEFAULT_CONFIG or other instances."""
+        first = Config(require_config_file=False)
+        first.config['limits']['max_lines'] = 5
+        first.config['bedrock']['timeout'] = 1
+        
+        second = Config(require_config_file=False)
+        self.assertEqual(second.get('limits.max_lines'), 10000)
+        self.assertEqual(second.get('bedrock.timeout'), 180)
+        self.assertNotIn('model_id', Config.DEFAULT_CONFIG['bedrock'])
     
     def test_config_file_loading(self):
         """Test loading configuration from a YAML file."""
-        config_data = {
-            'bedrock': {
-                'model_id': 'test-model-id',
-                'region': 'us-west-2',
-                'timeout': 60
-            },
-            'debug': True
-        }
-        
-        config_file = os.path.join(self.temp_dir.name, '.tern.yml')
-        with open(config_file, 'w') as f:
-            yaml.dump(config_data, f)
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'wb') as f:
+            f.write(_CFG_YAML)
         
         config = Config(config_path=config_file)
         
@@ -72,13 +69,13 @@ class TestConfig(unittest.TestCase):
     
     def test_custom_config_path(self):
         """Test using a custom config path."""
-        custom_path = os.path.join(self.temp_dir.name, 'custom.conf')
+        custom_path = os.path.join(self.temp_dir, 'custom.conf')
         config = Config(config_path=custom_path, require_config_file=False)
         self.assertEqual(config.config_path, custom_path)
     
     def test_json_config_format(self):
         """Test loading JSON format config."""
-        config_file = os.path.join(self.temp_dir.name, 'test.conf')
+        config_file = os.path.join(self.temp_dir, 'test.conf')
         with open(config_file, 'w') as f:
             json.dump({'bedrock': {'model_id': 'test-model-id', 'region': 'us-east-1', 'timeout': 90}}, f)
         
@@ -87,74 +84,92 @@ class TestConfig(unittest.TestCase):
     
     def test_deep_merge(self):
         """Test deep merging of configuration dictionaries."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config = Config(require_config_file=False)
-                
-                base = {
-                    'level1': {
-                        'level2': {
-                            'key1': 'value1',
-                            'key2': 'value2'
-                        },
-                        'other': 'data'
-                    }
-                }
-                override = {
-                    'level1': {
-                        'level2': {
-                            'key2': 'new_value2',
-                            'key3': 'value3'
-                        }
-                    }
+        config = Config(config_path=os.path.join(self.temp_dir, 'nonexistent.conf'),
+                        require_config_file=False)
+        
+        base = {
+            'level1': {
+                'level2': {
+                    'key1': 'value1',
+                    'key2': 'value2'
+                },
+                'other': 'data'
+            }
+        }
+        override = {
+            'level1': {
+                'level2': {
+                    'key2': 'new_value2',
+                    'key3': 'value3'
                 }
-                
-                config._deep_merge(base, override)
-                
-                self.assertEqual(base['level1']['level2']['key1'], 'value1')
-                self.assertEqual(base['level1']['level2']['key2'], 'new_value2')
-                self.assertEqual(base['level1']['level2']['key3'], 'value3')
-                self.assertEqual(base['level1']['other'], 'data')
-        finally:
-            os.chdir(original_cwd)
+            }
+        }
+        
+        config._deep_merge(base, override)
+        
+        self.assertEqual(base['level1']['level2']['key1'], 'value1')
+        self.assertEqual(base['level1']['level2']['key2'], 'new_value2')
+        self.assertEqual(base['level1']['level2']['key3'], 'value3')
+        self.assertEqual(base['level1']['other'], 'data')
+    
+    def test_deep_merge_deeper_than_recursion_limit(self):
+        """Test that merging nests deeper than the recursion limit works."""
+        config = Config(config_path=os.path.join(self.temp_dir, 'nonexistent.conf'),
+                        require_config_file=False)
+        depth = sys.getrecursionlimit() + 100
+        
+        base, override = {}, {}
+        b, o = base, override
+        for _ in range(depth):
+            b['n'], o['n'] = {'keep': True}, {}
+            b, o = b['n'], o['n']
+        o['value'] = 'deep'
+        
+        config._deep_merge(base, override)
+        
+        node = base
+        for _ in range(depth):
+            node = node['n']
+            self.assertTrue(node['keep'])
+        self.assertEqual(node['value'], 'deep')
     
     def test_get_method(self):
         """Test the get method with dot notation."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config = Config(require_config_file=False)
-                
-                self.assertEqual(config.get('bedrock.timeout'), 180)
-                self.assertEqual(config.get('debug'), False)
-                
-                self.assertEqual(config.get('non.existing.key', 'default'), 'default')
-                self.assertIsNone(config.get('non.existing.key'))
-        finally:
-            os.chdir(original_cwd)
+        config = Config(config_path=os.path.join(self.temp_dir, 'nonexistent.conf'),
+                        require_config_file=False)
+        
+        self.assertEqual(config.get('bedrock.timeout'), 180)
+        self.assertEqual(config.get('debug'), False)
+        
+        self.assertEqual(config.get('non.existing.key', 'default'), 'default')
+        self.assertIsNone(config.get('non.existing.key'))
     
     def test_attribute_access(self):
         """Test attribute-style access to configuration."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config = Config(require_config_file=False)
-                
-                bedrock_section = config.bedrock
-                self.assertIsInstance(bedrock_section, ConfigSection)
-                
-                self.assertEqual(config.bedrock.timeout, 180)
-                
-                self.assertEqual(config.debug, False)
-                
-                with self.assertRaises(AttributeError):
-                    _ = config.non_existing_attribute
-        finally:
-            os.chdir(original_cwd)
+        config = Config(config_path=os.path.join(self.temp_dir, 'nonexistent.conf'),
+                        require_config_file=False)
+        
+        bedrock_section = config.bedrock
+        self.assertIsInstance(bedrock_section, ConfigSection)
+        
+        self.assertEqual(config.bedrock.timeout, 180)
+        
+        self.assertEqual(config.debug, False)
+        
+        with self.assertRaises(AttributeError):
+            _ = config.non_existing_attribute
+    
+    def test_section_wrapper_reused(self):
+        """Test that section wrappers are reused until the section dict is replaced."""
+        config = Config(require_config_file=False)
+        
+        self.assertIs(config.bedrock, config.bedrock)
+        
+        config.config['bedrock']['timeout'] = 30
+        self.assertEqual(config.bedrock.timeout, 30)
+        
+        config.config['bedrock'] = {'timeout': 60}
+        self.assertEqual(config.bedrock.timeout, 60)
     
     def test_config_section(self):
         """Test the ConfigSection class."""
@@ -183,38 +198,100 @@ class TestConfig(unittest.TestCase):
     
     def test_invalid_yaml_handling(self):
         """Test handling of invalid YAML files."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config_file = os.path.join(temp_dir, '.tern.yml')
-                with open(config_file, 'w') as f:
-                    f.write('invalid: yaml: content: [')
-                
-                with patch('builtins.print') as mock_print:
-                    config = Config(config_path=config_file, require_config_file=False)
-                    mock_print.assert_called_once()
-                    self.assertIn('Warning: Failed to load config', mock_print.call_args[0][0])
-                
-                self.assertEqual(config.get('bedrock.timeout'), 180)
-        finally:
-            os.chdir(original_cwd)
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('invalid: yaml: content: [')
+        
+        with patch('builtins.print') as mock_print:
+            config = Config(config_path=config_file, require_config_file=False)
+            mock_print.assert_called_once()
+            self.assertIn('Warning: Failed to load config', mock_print.call_args[0][0])
+        
+        self.assertEqual(config.get('bedrock.timeout'), 180)
     
     def test_empty_yaml_file(self):
         """Test handling of empty YAML file."""
-        original_cwd = os.getcwd()
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config_file = os.path.join(temp_dir, '.tern.yml')
-                Path(config_file).touch()
-                
-                config = Config(config_path=config_file, require_config_file=False)
-                
-                self.assertEqual(config.get('bedrock.timeout'), 180)
-                self.assertEqual(config.get('debug'), False)
-        finally:
-            os.chdir(original_cwd)
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'wb'):
+            pass
+        
+        config = Config(config_path=config_file, require_config_file=False)
+        
+        self.assertEqual(config.get('bedrock.timeout'), 180)
+        self.assertEqual(config.get('debug'), False)
+
+    
+    def test_yaml_config_cache_reused(self):
+        """Test that a parsed YAML config is cached and reused."""
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n  model_id: cached-model\n  region: us-west-2\n')
+        
+        Config(config_path=config_file)
+        self.assertTrue(os.path.exists(config_file + Config.CACHE_SUFFIX))
+        
+        with patch('tern.config.yaml.load') as mock_load:
+            config = Config(config_path=config_file)
+            mock_load.assert_not_called()
+        
+        self.assertEqual(config.get('bedrock.model_id'), 'cached-model')
+        self.assertEqual(config.get('bedrock.region'), 'us-west-2')
+    
+    def test_yaml_config_cache_invalidated_on_change(self):
+        """Test that editing the config file invalidates the cache."""
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n  model_id: old-model\n  region: us-west-2\n')
+        Config(config_path=config_file)
+        
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n  model_id: new-model-id\n  region: us-west-2\n')
+        
+        config = Config(config_path=config_file)
+        self.assertEqual(config.get('bedrock.model_id'), 'new-model-id')
+    
+    def test_yaml_config_cache_disabled(self):
+        """Test that TERN_NO_CACHE disables the config cache."""
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n  model_id: test-model-id\n  region: us-west-2\n')
+        
+        with patch.dict(os.environ, {'TERN_NO_CACHE': '1'}):
+            config = Config(config_path=config_file)
+        
+        self.assertFalse(os.path.exists(config_file + Config.CACHE_SUFFIX))
+        self.assertEqual(config.get('bedrock.region'), 'us-west-2')
+    
+    def test_json_config_not_cached(self):
+        """Test that JSON configs are parsed directly without a cache file."""
+        config_file = os.path.join(self.temp_dir, 'test.conf')
+        with open(config_file, 'w') as f:
+            json.dump({'bedrock': {'model_id': 'test-model-id', 'region': 'us-east-1'}}, f)
+        
+        Config(config_path=config_file)
+        self.assertFalse(os.path.exists(config_file + Config.CACHE_SUFFIX))
+
+    
+    def test_flow_style_yaml_config(self):
+        """Test YAML flow mappings that look like JSON but are not."""
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('{bedrock: {model_id: test-model-id, region: eu-west-1}}')
+        
+        config = Config(config_path=config_file)
+        self.assertEqual(config.get('bedrock.region'), 'eu-west-1')
+    
+    def test_json_extension_skips_yaml(self):
+        """Test that .json config files are never parsed as YAML."""
+        config_file = os.path.join(self.temp_dir, 'tern.json')
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n  timeout: 60\n')
+        
+        with patch('builtins.print') as mock_print:
+            config = Config(config_path=config_file, require_config_file=False)
+            self.assertIn('Warning: Failed to load config', mock_print.call_args[0][0])
+        
+        self.assertEqual(config.get('bedrock.timeout'), 180)
 
 
 if __name__ == '__main__':
@@ -1,41 +1,37 @@
 """Unit tests for configuration edge cases and validation."""
 
 import unittest
-import sys
 import os
 import tempfile
-import yaml
 from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
 import json
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
-
 from tern.config import Config, ConfigSection
 from tern.wrapper import CommandWrapper
 from tern.ai_analyzer import AIAnalyzer
 
+from ._helpers import mocked_subprocess
+
 
 class TestConfigValidation(unittest.TestCase):
     """Test cases for configuration validation and edge cases."""
     
+    @classmethod
+    def setUpClass(cls):
+        cls._root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._root.cleanup)
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.original_cwd = os.getcwd()
-        os.chdir(self.temp_dir)
-    
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        import shutil
-        shutil.rmtree(self.temp_dir)
+        self.temp_dir = os.path.join(self._root.name, self.id().split('.')[-1])
+        os.makedirs(self.temp_dir)
     
     def test_negative_timeout_value(self):
         """Test handling of negative timeout value."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({'bedrock': {'timeout': -10}}, f)
+            f.write('bedrock:\n  timeout: -10\n')
         
         config = Config(require_config_file=False)
         timeout = config.get('bedrock.timeout')
@@ -45,7 +41,7 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling of timeout as string instead of integer."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({'bedrock': {'timeout': '120'}}, f)
+            f.write("bedrock:\n  timeout: '120'\n")
         
         config = Config(require_config_file=False)
         timeout = config.get('bedrock.timeout')
@@ -55,38 +51,48 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling of timeout that exceeds system limits."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({'bedrock': {'timeout': 999999999}}, f)
+            f.write('bedrock:\n  timeout: 999999999\n')
         
         config = Config(require_config_file=False)
         timeout = config.get('bedrock.timeout')
         self.assertIsNotNone(timeout)
     
+    def test_invalid_limits_and_timeout_fall_back_to_defaults(self):
+        """Test that non-positive or non-finite limits and timeouts in a file are replaced."""
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'w') as f:
+            f.write('bedrock:\n'
+                    '  timeout: .nan\n'
+                    'limits:\n'
+                    '  output_chars: -1\n'
+                    '  error_chars: 0\n'
+                    '  max_lines: 2.5\n')
+        
+        config = Config(config_path=config_file, require_config_file=False)
+        self.assertEqual(config.get('bedrock.timeout'), 180)
+        self.assertEqual(config.get('limits.output_chars'), 15000)
+        self.assertEqual(config.get('limits.error_chars'), 5000)
+        self.assertEqual(config.get('limits.max_lines'), 10000)
+    
     def test_conflicting_ai_flags(self):
         """Test handling of conflicting AI verbosity flags."""
         wrapper = CommandWrapper(Config(require_config_file=False))
         wrapper.ai_analyzer = Mock()
         
-        with patch('tern.wrapper.subprocess.Popen') as mock_popen:
-            mock_process = Mock()
-            mock_process.stdout = Mock()
-            mock_process.stderr = Mock()
-            mock_process.wait.return_value = 0
-            mock_popen.return_value = mock_process
-            
-            with patch('tern.wrapper.threading.Thread'):
-                wrapper.run(['plan', '--ai-verbose', '--ai-summary'])
-            
-            cmd = mock_popen.call_args[0][0]
-            self.assertEqual(cmd, 'plan')
+        with mocked_subprocess() as (_, commands):
+            wrapper.run(['plan', '--ai-verbose', '--ai-summary'])
+        
+        self.assertEqual(commands, [['plan']])
     
     def test_unknown_config_values(self):
         """Test handling of unknown config values."""
         config_file = os.path.join(self.temp_dir, 'test.conf')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {'model_id': 'test', 'region': 'us-east-1'},
-                'unknown_section': {'unknown_key': 'unknown_value'}
-            }, f)
+            f.write('bedrock:\n'
+                    '  model_id: test\n'
+                    '  region: us-east-1\n'
+                    'unknown_section:\n'
+                    '  unknown_key: unknown_value\n')
         
         config = Config(config_path=config_file)
         unknown = config.get('unknown_section.unknown_key')
@@ -96,7 +102,7 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling when required bedrock configuration is missing."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({'analysis': {'risk_assessment': True}}, f)
+            f.write('analysis:\n  risk_assessment: true\n')
         
         config = Config(require_config_file=False)
         model_id = config.get('bedrock.model_id')
@@ -106,14 +112,11 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling of None/null values in configuration."""
         config_file = os.path.join(self.temp_dir, 'test.conf')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    'model_id': 'test',
-                    'region': 'us-east-1',
-                    'timeout': None
-                },
-                'analysis': None
-            }, f)
+            f.write('bedrock:\n'
+                    '  model_id: test\n'
+                    '  region: us-east-1\n'
+                    '  timeout: null\n'
+                    'analysis: null\n')
         
         config = Config(config_path=config_file)
         timeout = config.get('bedrock.timeout')
@@ -125,11 +128,7 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling of empty dictionaries in configuration."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {},
-                'analysis': {},
-                'output': {}
-            }, f)
+            f.write('bedrock: {}\nanalysis: {}\noutput: {}\n')
         
         config = Config(require_config_file=False)
         self.assertEqual(config.get('bedrock.timeout'), 180)
@@ -138,7 +137,7 @@ class TestConfigValidation(unittest.TestCase):
         """Test deep merge with type mismatches."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({'bedrock': 'not_a_dict'}, f)
+            f.write('bedrock: not_a_dict\n')
         
         config = Config(require_config_file=False)
         bedrock = config.bedrock
@@ -148,13 +147,10 @@ class TestConfigValidation(unittest.TestCase):
         """Test handling of boolean values provided as strings in config files."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    'model_id': 'test-model',
-                    'region': 'us-east-1'
-                },
-                'debug': 'true'
-            }, f)
+            f.write('bedrock:\n'
+                    '  model_id: test-model\n'
+                    '  region: us-east-1\n'
+                    "debug: 'true'\n")
         
         config = Config(config_path=config_file, require_config_file=False)
         debug = config.get('debug')
@@ -208,16 +204,12 @@ bedrock:
     
     def test_very_deeply_nested_config(self):
         """Test handling of very deeply nested configuration."""
-        deep_config = {'level0': {}}
-        current = deep_config['level0']
-        for i in range(100):
-            current[f'level{i+1}'] = {}
-            current = current[f'level{i+1}']
-        current['value'] = 'deep'
+        deep_yaml = ''.join(f"{'  ' * i}level{i}:\n" for i in range(101))
+        deep_yaml += '  ' * 101 + 'value: deep\n'
         
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump(deep_config, f)
+            f.write(deep_yaml)
         
         config = Config(require_config_file=False)
         self.assertIsNotNone(config)
@@ -226,13 +218,10 @@ bedrock:
         """Test configuration with special characters in keys."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    'model-id': 'test',
-                    'timeout.seconds': 120,
-                    'region name': 'us-east-1'
-                }
-            }, f)
+            f.write('bedrock:\n'
+                    '  model-id: test\n'
+                    '  timeout.seconds: 120\n'
+                    '  region name: us-east-1\n')
         
         config = Config(require_config_file=False)
         self.assertIsNotNone(config.bedrock)
@@ -241,12 +230,9 @@ bedrock:
         """Test configuration with numeric keys."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    123: 'numeric key',
-                    '456': 'string numeric key'
-                }
-            }, f)
+            f.write('bedrock:\n'
+                    '  123: numeric key\n'
+                    "  '456': string numeric key\n")
         
         config = Config(require_config_file=False)
         self.assertIsNotNone(config.bedrock)
@@ -255,15 +241,15 @@ bedrock:
         """Test configuration with list values."""
         config_file = os.path.join(self.temp_dir, '.tern.yml')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    'regions': ['us-east-1', 'us-west-2'],
-                    'models': [
-                        {'id': 'model1', 'timeout': 60},
-                        {'id': 'model2', 'timeout': 120}
-                    ]
-                }
-            }, f)
+            f.write('bedrock:\n'
+                    '  regions:\n'
+                    '  - us-east-1\n'
+                    '  - us-west-2\n'
+                    '  models:\n'
+                    '  - id: model1\n'
+                    '    timeout: 60\n'
+                    '  - id: model2\n'
+                    '    timeout: 120\n')
         
         config = Config(require_config_file=False)
         regions = config.bedrock.get('regions')
@@ -279,14 +265,16 @@ bedrock:
             "bedrock:\n  region: 'unclosed string",
         ]
         
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        config = Config(config_path=config_file, require_config_file=False)
+        
         for invalid_yaml in test_cases:
-            config_file = os.path.join(self.temp_dir, '.tern.yml')
             with open(config_file, 'w') as f:
                 f.write(invalid_yaml)
             
             with patch('builtins.print'):
-                config = Config(require_config_file=False)
-                self.assertEqual(config.get('bedrock.timeout'), 180)
+                self.assertFalse(config._load_config())
+            self.assertEqual(config.get('bedrock.timeout'), 180)
     
     def test_config_merge_with_different_types(self):
         """Test merging configurations with different types."""
@@ -314,13 +302,10 @@ bedrock:
         
         config_file = os.path.join(self.temp_dir, 'test.conf')
         with open(config_file, 'w') as f:
-            yaml.dump({
-                'bedrock': {
-                    'model_id': 'test',
-                    'region': '${TEST_REGION}',
-                    'timeout': '${TEST_TIMEOUT}'
-                }
-            }, f)
+            f.write('bedrock:\n'
+                    '  model_id: test\n'
+                    '  region: ${TEST_REGION}\n'
+                    '  timeout: ${TEST_TIMEOUT}\n')
         
         config = Config(config_path=config_file)
         region = config.get('bedrock.region')
@@ -1,14 +1,13 @@
 """Tests to fill coverage gaps in the TERN codebase."""
 
 import unittest
-import sys
 import os
+import re
 import tempfile
 import json
+import types
 from unittest.mock import Mock, patch, MagicMock
-from io import StringIO
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+from io import BytesIO
 
 from tern.wrapper import CommandWrapper
 from tern.config import Config, ConfigSection
@@ -18,30 +17,36 @@ from tern.cli import main
 class TestUsageDisplay(unittest.TestCase):
     """Test cases for usage/help display."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the config once; it points at a config file that doesn't exist."""
+        temp_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls._config = Config(config_path=os.path.join(temp_dir.name, '.tern.conf'),
+                             require_config_file=False)
+    
     def test_no_arguments_shows_usage(self):
         """Test that running tern without arguments shows usage."""
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self._config)
         
         with patch('builtins.print') as mock_print:
             exit_code = wrapper.run([])
             
             self.assertEqual(exit_code, 1)
             
-            print_calls = [call[0][0] for call in mock_print.call_args_list]
-            self.assertTrue(any('Usage: tern <command>' in call for call in print_calls))
-            self.assertTrue(any('Examples:' in call for call in print_calls))
-            self.assertTrue(any('tern terraform plan' in call for call in print_calls))
-            self.assertTrue(any('tern terraform apply' in call for call in print_calls))
-            self.assertTrue(any('tern ls -la' in call for call in print_calls))
-            self.assertTrue(any('tern echo' in call for call in print_calls))
-            self.assertTrue(any('TERN flags:' in call for call in print_calls))
-            self.assertTrue(any('--no-ai' in call for call in print_calls))
+            joined = '\n'.join(call[0][0] for call in mock_print.call_args_list)
+            self.assertIn('Usage: tern <command>', joined)
+            self.assertIn('Examples:', joined)
+            self.assertIn('tern terraform plan', joined)
+            self.assertIn('tern terraform apply', joined)
+            self.assertIn('tern ls -la', joined)
+            self.assertIn('tern echo', joined)
+            self.assertIn('TERN flags:', joined)
+            self.assertIn('--no-ai', joined)
     
     def test_empty_list_shows_usage(self):
         """Test that an empty argument list shows usage."""
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self._config)
         
         with patch('builtins.print') as mock_print:
             exit_code = wrapper.run([])
@@ -55,6 +60,29 @@ class TestUsageDisplay(unittest.TestCase):
 class TestProductionConfigErrors(unittest.TestCase):
     """Test cases for production config file error handling."""
     
+    # Longest first, so a fragment can't be shadowed by one of its prefixes
+    _OUTPUT_PATTERN = re.compile('|'.join(re.escape(s) for s in sorted((
+        'ERROR: Configuration file not found',
+        'ERROR: Invalid configuration',
+        'Please create the config file',
+        'Please update your config file',
+        'set environment variables',
+        "Missing required 'bedrock.model_id'",
+        "Missing required 'bedrock.region'",
+        'bedrock.model_id',
+        'bedrock.region',
+        'TERN_BEDROCK_MODEL_ID',
+        'TERN_BEDROCK_REGION',
+        'Example',
+        '~/.tern.conf',
+        'export TERN_',
+    ), key=len, reverse=True)))
+    
+    def _printed_matches(self, mock_print):
+        """Return the known fragments found in everything printed."""
+        joined = '\n'.join(call[0][0] for call in mock_print.call_args_list)
+        return set(self._OUTPUT_PATTERN.findall(joined))
+    
     def test_missing_config_file_in_production(self):
         """Test error when config file is missing in production mode."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -66,17 +94,13 @@ class TestProductionConfigErrors(unittest.TestCase):
                 
                 self.assertEqual(cm.exception.code, 1)
                 
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                self.assertTrue(any('ERROR: Configuration file not found' in call for call in print_calls))
-                self.assertTrue(any('Please create the config file' in call for call in print_calls) or
-                               any('set environment variables' in call for call in print_calls))
-                self.assertTrue(any('bedrock.model_id' in call for call in print_calls) or
-                               any('TERN_BEDROCK_MODEL_ID' in call for call in print_calls))
-                self.assertTrue(any('bedrock.region' in call for call in print_calls) or 
-                               any('TERN_BEDROCK_REGION' in call for call in print_calls))
-                self.assertTrue(any('Example' in call for call in print_calls))
-                self.assertTrue(any('~/.tern.conf' in call for call in print_calls) or
-                               any('export TERN_' in call for call in print_calls))
+                matches = self._printed_matches(mock_print)
+                self.assertIn('ERROR: Configuration file not found', matches)
+                self.assertTrue(matches & {'Please create the config file', 'set environment variables'})
+                self.assertTrue(matches & {'bedrock.model_id', 'TERN_BEDROCK_MODEL_ID'})
+                self.assertTrue(matches & {'bedrock.region', 'TERN_BEDROCK_REGION'})
+                self.assertIn('Example', matches)
+                self.assertTrue(matches & {'~/.tern.conf', 'export TERN_'})
     
     def test_missing_required_fields_in_production(self):
         """Test error when required fields are missing in production mode."""
@@ -92,11 +116,11 @@ class TestProductionConfigErrors(unittest.TestCase):
                 
                 self.assertEqual(cm.exception.code, 1)
                 
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                self.assertTrue(any('ERROR: Invalid configuration' in call for call in print_calls))
-                self.assertTrue(any("Missing required 'bedrock.model_id'" in call for call in print_calls))
-                self.assertTrue(any("Missing required 'bedrock.region'" in call for call in print_calls))
-                self.assertTrue(any('Please update your config file' in call for call in print_calls))
+                self.assertLessEqual({'ERROR: Invalid configuration',
+                                      "Missing required 'bedrock.model_id'",
+                                      "Missing required 'bedrock.region'",
+                                      'Please update your config file'},
+                                     self._printed_matches(mock_print))
     
     def test_missing_bedrock_section_in_production(self):
         """Test error when bedrock section is missing in production mode."""
@@ -112,46 +136,46 @@ class TestProductionConfigErrors(unittest.TestCase):
                 
                 self.assertEqual(cm.exception.code, 1)
                 
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                self.assertTrue(any("Missing required 'bedrock.model_id'" in call for call in print_calls))
+                self.assertIn("Missing required 'bedrock.model_id'", self._printed_matches(mock_print))
 
 
 class TestOutputStreamingEdgeCases(unittest.TestCase):
     """Test cases for edge cases in output streaming."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the config once; it points at a config file that doesn't exist."""
+        temp_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls._config = Config(config_path=os.path.join(temp_dir.name, '.tern.conf'),
+                             require_config_file=False)
+    
+    @staticmethod
+    def _make_mock_process(stdout, stderr):
+        """Build a process that exits 0 with the given pipes, whose close() is recorded."""
+        stdout.close = Mock()
+        stderr.close = Mock()
+        return types.SimpleNamespace(stdout=stdout, stderr=stderr, wait=lambda: 0)
+    
+    @staticmethod
+    def _thread_stub():
+        """Stand-in for a Thread whose target has already been run inline."""
+        return types.SimpleNamespace(daemon=True, start=lambda: None, join=lambda *a, **k: None)
+    
     @patch('tern.wrapper.subprocess.Popen')
     @patch('tern.wrapper.threading.Thread')
     def test_broken_pipe_error_handling(self, mock_thread_class, mock_popen):
         """Test handling of BrokenPipeError during output."""
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self._config)
         wrapper.ai_analyzer = Mock()
         
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        
-        mock_stdout = Mock()
-        mock_stderr = Mock()
-        
-        output_lines = ['line1\n', 'line2\n', '']
-        mock_stdout.readline = Mock(side_effect=output_lines)
-        mock_stderr.readline = Mock(return_value='')
-        mock_stdout.close = Mock()
-        mock_stderr.close = Mock()
-        
-        mock_process.stdout = mock_stdout
-        mock_process.stderr = mock_stderr
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = self._make_mock_process(BytesIO(b'line1\nline2\n'), BytesIO())
         
         def mock_thread_init(target=None, args=None):
-            thread = Mock()
-            thread.daemon = True
-            thread.start = Mock()
-            thread.join = Mock()
             if target and args:
                 with patch('builtins.print', side_effect=[None, BrokenPipeError()]):
                     target(*args)
-            return thread
+            return self._thread_stub()
         
         mock_thread_class.side_effect = mock_thread_init
         
@@ -162,33 +186,18 @@ class TestOutputStreamingEdgeCases(unittest.TestCase):
     @patch('tern.wrapper.threading.Thread')
     def test_generic_exception_in_read_output(self, mock_thread_class, mock_popen):
         """Test handling of generic exceptions in read_output thread."""
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self._config)
         wrapper.ai_analyzer = Mock()
         
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        
         mock_stdout = Mock()
-        mock_stderr = Mock()
-        
-        mock_stdout.readline = Mock(side_effect=Exception("Test exception"))
-        mock_stderr.readline = Mock(return_value='')
-        mock_stdout.close = Mock()
-        mock_stderr.close = Mock()
-        
-        mock_process.stdout = mock_stdout
-        mock_process.stderr = mock_stderr
-        mock_popen.return_value = mock_process
+        mock_stdout.read.side_effect = Exception("Test exception")
+        mock_stderr = BytesIO()
+        mock_popen.return_value = self._make_mock_process(mock_stdout, mock_stderr)
         
         def mock_thread_init(target=None, args=None):
-            thread = Mock()
-            thread.daemon = True
-            thread.start = Mock()
-            thread.join = Mock()
             if target and args:
                 target(*args)
-            return thread
+            return self._thread_stub()
         
         mock_thread_class.side_effect = mock_thread_init
         
@@ -202,30 +211,12 @@ class TestOutputStreamingEdgeCases(unittest.TestCase):
     @patch('tern.wrapper.threading.Thread')
     def test_broken_pipe_on_stderr(self, mock_thread_class, mock_popen):
         """Test handling of BrokenPipeError on stderr output."""
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self._config)
         wrapper.ai_analyzer = Mock()
         
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        
-        mock_stdout = Mock()
-        mock_stderr = Mock()
-        
-        mock_stdout.readline = Mock(return_value='')
-        mock_stderr.readline = Mock(side_effect=['error1\n', 'error2\n', ''])
-        mock_stdout.close = Mock()
-        mock_stderr.close = Mock()
-        
-        mock_process.stdout = mock_stdout
-        mock_process.stderr = mock_stderr
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = self._make_mock_process(BytesIO(), BytesIO(b'error1\nerror2\n'))
         
         def mock_thread_init(target=None, args=None):
-            thread = Mock()
-            thread.daemon = True
-            thread.start = Mock()
-            thread.join = Mock()
             if target and args:
                 is_stderr = len(args) > 3 and args[3] is True
                 if is_stderr:
@@ -233,7 +224,7 @@ class TestOutputStreamingEdgeCases(unittest.TestCase):
                         target(*args)
                 else:
                     target(*args)
-            return thread
+            return self._thread_stub()
         
         mock_thread_class.side_effect = mock_thread_init
         
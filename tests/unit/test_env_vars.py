@@ -4,7 +4,8 @@ import unittest
 import os
 import sys
 import tempfile
-import json
+from contextlib import redirect_stdout
+from io import StringIO
 from unittest.mock import patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
@@ -12,166 +13,199 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 from tern.config import Config
 
 
+_OVERRIDE_CFG_JSON = b'{"bedrock": {"model_id": "file-model-id", "region": "us-west-1", "timeout": 60}}'
+_PRECEDENCE_CFG_JSON = (b'{"bedrock": {"model_id": "file-model", "region": "file-region", "timeout": 100}, '
+                        b'"debug": true}')
+
+
 class TestEnvironmentVariables(unittest.TestCase):
     """Test cases for environment variable configuration."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Find inherited TERN_* variables and create the temp root once."""
+        cls._inherited_tern_keys = tuple(k for k in os.environ if k.startswith('TERN_'))
+        cls._root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._root.cleanup)
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.original_env = os.environ.copy()
-        for key in list(os.environ.keys()):
-            if key.startswith('TERN_'):
-                del os.environ[key]
+        self.temp_dir = os.path.join(self._root.name, self.id().split('.')[-1])
+        os.makedirs(self.temp_dir)
+        env_patcher = patch.dict(os.environ)
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+        for key in self._inherited_tern_keys:
+            os.environ.pop(key, None)
     
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.environ.clear()
-        os.environ.update(self.original_env)
+    @staticmethod
+    def _snapshot(config):
+        """Return the settings most tests check, keyed by dotted path."""
+        return {key: config.get(key)
+                for key in ('bedrock.model_id', 'bedrock.region', 'bedrock.timeout', 'debug')}
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'env-model-id',
+        'TERN_BEDROCK_TIMEOUT': '120'
+    })
     def test_env_var_overrides_config_file(self):
         """Test that environment variables override config file settings."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            config_file = os.path.join(temp_dir, 'test.conf')
-            
-            with open(config_file, 'w') as f:
-                json.dump({
-                    'bedrock': {
-                        'model_id': 'file-model-id',
-                        'region': 'us-west-1',
-                        'timeout': 60
-                    }
-                }, f)
-            
-            os.environ['TERN_BEDROCK_MODEL_ID'] = 'env-model-id'
-            os.environ['TERN_BEDROCK_TIMEOUT'] = '120'
-            
-            config = Config(config_path=config_file, require_config_file=False)
-            
-            self.assertEqual(config.get('bedrock.model_id'), 'env-model-id')
-            self.assertEqual(config.get('bedrock.region'), 'us-west-1')
-            self.assertEqual(config.get('bedrock.timeout'), 120)
+        config_file = os.path.join(self.temp_dir, 'test.conf')
+        
+        with open(config_file, 'wb') as f:
+            f.write(_OVERRIDE_CFG_JSON)
+        
+        config = Config(config_path=config_file, require_config_file=False)
+        
+        self.assertEqual(config.get('bedrock.model_id'), 'env-model-id')
+        self.assertEqual(config.get('bedrock.region'), 'us-west-1')
+        self.assertEqual(config.get('bedrock.timeout'), 120)
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'env-only-model',
+        'TERN_BEDROCK_REGION': 'eu-west-1',
+        'TERN_DEBUG': 'true'
+    })
     def test_env_var_without_config_file(self):
         """Test that environment variables work without a config file."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'env-only-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'eu-west-1'
-        os.environ['TERN_DEBUG'] = 'true'
-        
-        with tempfile.TemporaryDirectory() as temp_dir:
-            non_existent = os.path.join(temp_dir, 'non_existent.conf')
-            
-            config = Config(config_path=non_existent, require_config_file=True)
-            
-            self.assertEqual(config.get('bedrock.model_id'), 'env-only-model')
-            self.assertEqual(config.get('bedrock.region'), 'eu-west-1')
-            self.assertEqual(config.get('debug'), True)
+        non_existent = os.path.join(self.temp_dir, 'non_existent.conf')
+        
+        config = Config(config_path=non_existent, require_config_file=True)
+        
+        self.assertEqual(config.get('bedrock.model_id'), 'env-only-model')
+        self.assertEqual(config.get('bedrock.region'), 'eu-west-1')
+        self.assertEqual(config.get('debug'), True)
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'test-model',
+        'TERN_BEDROCK_REGION': 'us-east-1',
+        'TERN_DEBUG': 'false'
+    })
     def test_boolean_env_vars(self):
         """Test that boolean environment variables are parsed correctly."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'test-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'us-east-1'
-        os.environ['TERN_DEBUG'] = 'false'
-        
         config = Config(require_config_file=False)
         
         self.assertEqual(config.get('debug'), False)
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'test-model',
+        'TERN_BEDROCK_REGION': 'us-east-1',
+        'TERN_BEDROCK_TIMEOUT': '300'
+    })
     def test_numeric_env_vars(self):
         """Test that numeric environment variables are parsed correctly."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'test-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'us-east-1'
-        os.environ['TERN_BEDROCK_TIMEOUT'] = '300'
-        
         config = Config(require_config_file=False)
         
         self.assertEqual(config.get('bedrock.timeout'), 300)
         self.assertIsInstance(config.get('bedrock.timeout'), int)
     
+    @patch.dict(os.environ, {
+        'TERN_LIMITS_OUTPUT_CHARS': '-1',
+        'TERN_LIMITS_ERROR_CHARS': '2.5',
+        'TERN_LIMITS_MAX_LINES': 'nan',
+        'TERN_BEDROCK_TIMEOUT': '0',
+        'TERN_BEDROCK_REGION': 'us-east-1'
+    })
+    def test_invalid_numeric_env_vars_are_ignored(self):
+        """Test that non-positive, fractional and non-finite limits and timeouts are rejected."""
+        with redirect_stdout(StringIO()) as out:
+            config = Config(require_config_file=False)
+        
+        self.assertEqual(config.get('limits.output_chars'), 15000)
+        self.assertEqual(config.get('limits.error_chars'), 5000)
+        self.assertEqual(config.get('limits.max_lines'), 10000)
+        self.assertEqual(config.get('bedrock.timeout'), 180)
+        self.assertEqual(config.get('bedrock.region'), 'us-east-1')
+        for env_var in ('TERN_LIMITS_OUTPUT_CHARS', 'TERN_LIMITS_ERROR_CHARS',
+                        'TERN_LIMITS_MAX_LINES', 'TERN_BEDROCK_TIMEOUT'):
+            self.assertIn(f'Ignoring {env_var}=', out.getvalue())
+    
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'us.anthropic.claude-opus-4-1-20250805-v1:0',
+        'TERN_BEDROCK_REGION': 'us-east-2'
+    })
     def test_string_env_vars(self):
         """Test that string environment variables are preserved."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'us.anthropic.claude-opus-4-1-20250805-v1:0'
-        os.environ['TERN_BEDROCK_REGION'] = 'us-east-2'
-        
         config = Config(require_config_file=False)
         
         self.assertEqual(config.get('bedrock.model_id'), 'us.anthropic.claude-opus-4-1-20250805-v1:0')
         self.assertEqual(config.get('bedrock.region'), 'us-east-2')
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'test-model',
+        'TERN_BEDROCK_REGION': 'us-east-1',
+        'TERN_DEBUG': 'true'
+    })
     def test_debug_env_var(self):
         """Test that TERN_DEBUG environment variable works."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'test-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'us-east-1'
-        os.environ['TERN_DEBUG'] = 'true'
-        
         config = Config(require_config_file=False)
         
         self.assertEqual(config.get('debug'), True)
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'test-model',
+        'TERN_BEDROCK_REGION': 'us-west-2',
+        'TERN_BEDROCK_TIMEOUT': '240',
+        'TERN_DEBUG': 'true'
+    })
     def test_all_env_vars(self):
         """Test that all documented environment variables work."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'test-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'us-west-2'
-        os.environ['TERN_BEDROCK_TIMEOUT'] = '240'
-        os.environ['TERN_DEBUG'] = 'true'
-        
         config = Config(require_config_file=False)
         
-        self.assertEqual(config.get('bedrock.model_id'), 'test-model')
-        self.assertEqual(config.get('bedrock.region'), 'us-west-2')
-        self.assertEqual(config.get('bedrock.timeout'), 240)
-        self.assertEqual(config.get('debug'), True)
+        self.assertEqual(self._snapshot(config), {
+            'bedrock.model_id': 'test-model',
+            'bedrock.region': 'us-west-2',
+            'bedrock.timeout': 240,
+            'debug': True
+        })
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'minimal-model',
+        'TERN_BEDROCK_REGION': 'ap-south-1'
+    })
     def test_partial_env_vars_with_defaults(self):
         """Test that defaults are used when env vars are not set."""
-        os.environ['TERN_BEDROCK_MODEL_ID'] = 'minimal-model'
-        os.environ['TERN_BEDROCK_REGION'] = 'ap-south-1'
-        
         config = Config(require_config_file=False)
         
-        self.assertEqual(config.get('bedrock.model_id'), 'minimal-model')
-        self.assertEqual(config.get('bedrock.region'), 'ap-south-1')
-        
-        self.assertEqual(config.get('bedrock.timeout'), 180)
-        self.assertEqual(config.get('debug'), False)
+        self.assertEqual(self._snapshot(config), {
+            'bedrock.model_id': 'minimal-model',
+            'bedrock.region': 'ap-south-1',
+            'bedrock.timeout': 180,
+            'debug': False
+        })
     
+    @patch.dict(os.environ, {
+        'TERN_BEDROCK_MODEL_ID': 'env-model',
+        'TERN_DEBUG': 'false'
+    })
     def test_env_var_precedence_order(self):
         """Test configuration precedence: env vars > file > defaults."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            config_file = os.path.join(temp_dir, 'test.conf')
-            
-            with open(config_file, 'w') as f:
-                json.dump({
-                    'bedrock': {
-                        'model_id': 'file-model',
-                        'region': 'file-region',
-                        'timeout': 100
-                    },
-                    'debug': True
-                }, f)
-            
-            os.environ['TERN_BEDROCK_MODEL_ID'] = 'env-model'
-            os.environ['TERN_DEBUG'] = 'false'
-            
-            config = Config(config_path=config_file, require_config_file=False)
-            
-            self.assertEqual(config.get('bedrock.model_id'), 'env-model')
-            self.assertEqual(config.get('bedrock.region'), 'file-region')
-            self.assertEqual(config.get('bedrock.timeout'), 100)
-            self.assertEqual(config.get('debug'), False)
+        config_file = os.path.join(self.temp_dir, 'test.conf')
+        
+        with open(config_file, 'wb') as f:
+            f.write(_PRECEDENCE_CFG_JSON)
+        
+        config = Config(config_path=config_file, require_config_file=False)
+        
+        self.assertEqual(self._snapshot(config), {
+            'bedrock.model_id': 'env-model',
+            'bedrock.region': 'file-region',
+            'bedrock.timeout': 100,
+            'debug': False
+        })
     
     def test_missing_required_fields_with_no_env_vars(self):
         """Test error when required fields are missing and no env vars set."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            non_existent = os.path.join(temp_dir, 'non_existent.conf')
-            
-            with patch('builtins.print') as mock_print:
-                with self.assertRaises(SystemExit) as cm:
-                    Config(config_path=non_existent, require_config_file=True)
-                
-                self.assertEqual(cm.exception.code, 1)
-                
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                self.assertTrue(any('TERN_BEDROCK_MODEL_ID' in call for call in print_calls))
-                self.assertTrue(any('TERN_BEDROCK_REGION' in call for call in print_calls))
+        non_existent = os.path.join(self.temp_dir, 'non_existent.conf')
+        
+        with redirect_stdout(StringIO()) as out:
+            with self.assertRaises(SystemExit) as cm:
+                Config(config_path=non_existent, require_config_file=True)
+        
+        self.assertEqual(cm.exception.code, 1)
+        
+        self.assertIn('TERN_BEDROCK_MODEL_ID', out.getvalue())
+        self.assertIn('TERN_BEDROCK_REGION', out.getvalue())
 
 
 if __name__ == '__main__':
@@ -1,13 +1,14 @@
 """Integration tests for the TERN tool."""
 
 import unittest
+import copy
 import tempfile
 import os
 import sys
-import yaml
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
-import json
+from contextlib import redirect_stderr, redirect_stdout
+from io import BytesIO, StringIO
+from unittest.mock import Mock, patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
@@ -17,34 +18,61 @@ from tern.wrapper import CommandWrapper
 from tern.ai_analyzer import AIAnalyzer
 
 
+_DISCOVERY_CFG_YAML = b"bedrock:\n  model_id: custom-model-id\n  region: eu-west-1\n  timeout: 45\ndebug: true\n"
+_PLAN_CFG_YAML = b"bedrock:\n  region: us-west-2\n"
+
+# Canned Bedrock response bodies, as invoke_model's body.read() returns them
+_PLAN_ANALYSIS_BODY = b'{"content": [{"text": "Plan analysis: 3 resources to add, no issues detected."}]}'
+_ANALYSIS_BODY = b'{"content": [{"text": "Test analysis"}]}'
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for TERN components."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create the temp root and build the default config once.
+        
+        The default config points at a config file that doesn't exist.
+        """
+        cls._root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._root.cleanup)
+        cls._base_config = Config(config_path=os.path.join(cls._root.name, '.tern.conf'),
+                                  require_config_file=False)
+        
+        cls._popen_patcher = patch('tern.wrapper.subprocess.Popen')
+        cls._mock_popen = cls._popen_patcher.start()
+        cls.addClassCleanup(cls._popen_patcher.stop)
+        cls._boto_patcher = patch('tern.ai_analyzer.boto3.client')
+        cls._mock_boto = cls._boto_patcher.start()
+        cls.addClassCleanup(cls._boto_patcher.stop)
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.original_cwd = os.getcwd()
-        os.chdir(self.temp_dir.name)
-    
-    def tearDown(self):
-        """Clean up test fixtures."""
-        os.chdir(self.original_cwd)
-        self.temp_dir.cleanup()
+        self.config = copy.copy(self._base_config)
+        self.config.config = copy.deepcopy(self._base_config.config)
+        
+        # Popen returns a process that exits 0 with no output unless a test says otherwise
+        self.mock_process = Mock()
+        self.mock_process.wait.return_value = 0
+        self.mock_process.stdout = BytesIO()
+        self.mock_process.stderr = BytesIO()
+        self.mock_popen = self._mock_popen
+        self.mock_popen.reset_mock(return_value=True, side_effect=True)
+        self.mock_popen.return_value = self.mock_process
+        
+        self.mock_bedrock = Mock()
+        self._mock_boto.reset_mock(return_value=True, side_effect=True)
+        self._mock_boto.return_value = self.mock_bedrock
+        
+        self.temp_dir = os.path.join(self._root.name, self.id().split('.')[-1])
+        os.makedirs(self.temp_dir)
     
     def test_config_file_discovery_and_loading(self):
         """Test complete config file discovery and loading flow."""
-        config_data = {
-            'bedrock': {
-                'region': 'eu-west-1',
-                'timeout': 45,
-                'model_id': 'custom-model-id'
-            },
-            'debug': True
-        }
-        
-        config_file = os.path.join(self.temp_dir.name, '.tern.yml')
-        with open(config_file, 'w') as f:
-            yaml.dump(config_data, f)
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'wb') as f:
+            f.write(_DISCOVERY_CFG_YAML)
         
         config = Config(config_path=config_file, require_config_file=False)
         
@@ -53,107 +81,70 @@ class TestIntegration(unittest.TestCase):
         self.assertEqual(config.get('bedrock.model_id'), 'custom-model-id')
         self.assertTrue(config.get('debug'))
     
-    @patch('tern.wrapper.subprocess.Popen')
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_end_to_end_terraform_plan(self, mock_boto_client, mock_popen):
+    def test_end_to_end_terraform_plan(self):
         """Test end-to-end flow for terraform plan command."""
-        config_data = {
-            'bedrock': {
-                'region': 'us-west-2'
-            }
+        config_file = os.path.join(self.temp_dir, '.tern.yml')
+        with open(config_file, 'wb') as f:
+            f.write(_PLAN_CFG_YAML)
+        
+        self.mock_bedrock.invoke_model.return_value = {
+            'body': Mock(read=Mock(return_value=_PLAN_ANALYSIS_BODY))
         }
-        with open('.tern.yml', 'w') as f:
-            yaml.dump(config_data, f)
         
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
+        self.mock_process.stdout = BytesIO(b'Plan: 3 to add\n')
         
-        mock_response = {
-            'body': MagicMock()
-        }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'Plan analysis: 3 resources to add, no issues detected.'}]
-        }).encode('utf-8')
-        mock_bedrock.invoke_model.return_value = mock_response
-        
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.stdout.readline = Mock(side_effect=['Plan: 3 to add\n', ''])
-        mock_process.stderr.readline = Mock(return_value='')
-        mock_popen.return_value = mock_process
-        
-        config = Config(require_config_file=False)
+        config = Config(config_path=config_file, require_config_file=False)
+        self.assertEqual(config.get('bedrock.region'), 'us-west-2')
         wrapper = CommandWrapper(config)
         
         with patch('sys.stdout.isatty', return_value=True):
             with patch('builtins.print') as mock_print:
                 exit_code = wrapper.run(['terraform', 'plan'])
         
-        mock_popen.assert_called_once()
-        cmd = mock_popen.call_args[0][0]
-        self.assertEqual(cmd, 'terraform plan')
+        self.mock_popen.assert_called_once()
+        cmd = self.mock_popen.call_args[0][0]
+        self.assertEqual(cmd, ['terraform', 'plan'])
         
-        mock_bedrock.invoke_model.assert_called_once()
+        self.mock_bedrock.invoke_model.assert_called_once()
         
         self.assertEqual(exit_code, 0)
     
-    @patch('tern.wrapper.subprocess.Popen')
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_no_ai_flag_disables_analysis(self, mock_boto_client, mock_popen):
+    def test_no_ai_flag_disables_analysis(self):
         """Test that --no-ai flag properly disables AI analysis."""
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
-        mock_popen.return_value = mock_process
-        
-        mock_bedrock = Mock()
-        mock_boto_client.return_value = mock_bedrock
-        
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self.config)
         
         exit_code = wrapper.run(['terraform', 'plan', '--no-ai'])
         
-        mock_bedrock.invoke_model.assert_not_called()
+        self.mock_bedrock.invoke_model.assert_not_called()
         
-        cmd = mock_popen.call_args[0][0]
-        self.assertEqual(cmd, 'terraform plan')
+        cmd = self.mock_popen.call_args[0][0]
+        self.assertEqual(cmd, ['terraform', 'plan'])
     
     
-    @patch('tern.wrapper.subprocess.Popen')
-    def test_error_propagation(self, mock_popen):
+    def test_error_propagation(self):
         """Test that terraform errors are properly propagated."""
-        mock_process = Mock()
-        mock_process.wait.return_value = 1
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(side_effect=['Error: Invalid configuration\n', ''])
-        mock_popen.return_value = mock_process
+        self.mock_process.wait.return_value = 1
+        self.mock_process.stderr = BytesIO(b'Error: Invalid configuration\n')
         
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self.config)
         
-        with patch('builtins.print'):
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
             exit_code = wrapper.run(['validate'])
         
         self.assertEqual(exit_code, 1)
     
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_ai_analyzer_error_handling(self, mock_boto_client):
+    def test_ai_analyzer_error_handling(self):
         """Test AI analyzer handles AWS errors gracefully."""
         from botocore.exceptions import ClientError
         
-        mock_bedrock = Mock()
-        mock_bedrock.invoke_model.side_effect = ClientError(
+        self.mock_bedrock.invoke_model.side_effect = ClientError(
             {'Error': {'Code': 'AccessDeniedException'}},
             'invoke_model'
         )
-        mock_boto_client.return_value = mock_bedrock
         
-        config = Config(require_config_file=False)
-        analyzer = AIAnalyzer(config)
+        analyzer = AIAnalyzer(self.config)
         
-        with patch('builtins.print') as mock_print:
+        with redirect_stderr(StringIO()) as err:
             result = analyzer.analyze(
                 command='plan',
                 output='Some output',
@@ -163,61 +154,35 @@ class TestIntegration(unittest.TestCase):
         
         self.assertIsNone(result)
         
-        print_calls = [call[0][0] for call in mock_print.call_args_list]
-        self.assertTrue(any('Access denied' in call for call in print_calls))
+        self.assertIn('Access denied', err.getvalue())
     
     def test_config_section_nested_access(self):
         """Test nested configuration access patterns."""
-        original_cwd = os.getcwd()
-        
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                config = Config(require_config_file=False)
-                
-                bedrock_config = config.bedrock
-                self.assertEqual(bedrock_config.timeout, 180)
-                self.assertEqual(bedrock_config.region, 'us-east-1')
-                
-                self.assertEqual(bedrock_config.get('timeout'), 180)
-                self.assertEqual(bedrock_config.get('non_existing', 'default'), 'default')
-                
-                self.assertEqual(bedrock_config['timeout'], 180)
-                
-                self.assertIn('timeout', bedrock_config)
-                self.assertNotIn('non_existing', bedrock_config)
-                
-        finally:
-            os.chdir(original_cwd)
+        bedrock_config = self.config.bedrock
+        self.assertEqual(bedrock_config.timeout, 180)
+        self.assertEqual(bedrock_config.region, 'us-east-1')
+        
+        self.assertEqual(bedrock_config.get('timeout'), 180)
+        self.assertEqual(bedrock_config.get('non_existing', 'default'), 'default')
+        
+        self.assertEqual(bedrock_config['timeout'], 180)
+        
+        self.assertIn('timeout', bedrock_config)
+        self.assertNotIn('non_existing', bedrock_config)
     
-    @patch('tern.wrapper.subprocess.Popen')
-    @patch('tern.ai_analyzer.boto3.client')
-    def test_deprecated_flags_ignored(self, mock_boto_client, mock_popen):
+    def test_deprecated_flags_ignored(self):
         """Test that deprecated flags are silently ignored."""
-        mock_process = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
-        mock_popen.return_value = mock_process
-        
-        mock_bedrock = Mock()
-        mock_response = {
-            'body': MagicMock()
+        self.mock_bedrock.invoke_model.return_value = {
+            'body': Mock(read=Mock(return_value=_ANALYSIS_BODY))
         }
-        mock_response['body'].read.return_value = json.dumps({
-            'content': [{'text': 'Test analysis'}]
-        }).encode('utf-8')
-        mock_bedrock.invoke_model.return_value = mock_response
-        mock_boto_client.return_value = mock_bedrock
         
-        config = Config(require_config_file=False)
-        wrapper = CommandWrapper(config)
+        wrapper = CommandWrapper(self.config)
         
-        with patch('builtins.print'):
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
             wrapper.run(['plan', '--ai-verbose', '--ai-summary'])
         
-        cmd = mock_popen.call_args[0][0]
-        self.assertEqual(cmd, 'plan')
+        cmd = self.mock_popen.call_args[0][0]
+        self.assertEqual(cmd, ['plan'])
 
 
 if __name__ == '__main__':
@@ -8,6 +8,7 @@ import tempfile
 import shutil
 import threading
 import time
+from io import BytesIO
 from unittest.mock import Mock, patch, MagicMock, call
 from pathlib import Path
 
@@ -78,10 +79,8 @@ class TestSubprocessIntegration(unittest.TestCase):
                 huge_output.append('x' * 1000 + f' line {i}\n')
             huge_output.append('')
             
-            mock_stdout = Mock()
-            mock_stderr = Mock()
-            mock_stdout.readline = Mock(side_effect=huge_output)
-            mock_stderr.readline = Mock(side_effect=[''])
+            mock_stdout = BytesIO(''.join(huge_output).encode('utf-8'))
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
@@ -125,11 +124,11 @@ class TestSubprocessIntegration(unittest.TestCase):
                     self.count = 0
                     self.max_before_block = 65536
                 
-                def readline(self):
+                def read(self, size=-1):
                     if self.count < 100:
                         self.count += 1
-                        return 'x' * 1000 + '\n'
-                    return ''
+                        return b'x' * 1000 + b'\n'
+                    return b''
                 
                 def close(self):
                     pass
@@ -233,13 +232,8 @@ class TestSubprocessIntegration(unittest.TestCase):
             mock_stdout = Mock()
             mock_stderr = Mock()
             
-            mock_stdout.readline = Mock(side_effect=[
-                'Normal text\n',
-                '\x00\x01\x02\x03\n',
-                'More text\n',
-                ''
-            ])
-            mock_stderr.readline = Mock(side_effect=[''])
+            mock_stdout = BytesIO(b'Normal text\n\x00\x01\x02\x03\nMore text\n')
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
@@ -265,11 +259,11 @@ class TestSubprocessIntegration(unittest.TestCase):
                 def __init__(self):
                     self.calls = 0
                 
-                def readline(self):
+                def read(self, size=-1):
                     self.calls += 1
                     if self.calls == 1:
-                        return "Quick output\n"
-                    return ''
+                        return b"Quick output\n"
+                    return b''
                 
                 def close(self):
                     pass
@@ -297,10 +291,8 @@ class TestSubprocessIntegration(unittest.TestCase):
         with patch('tern.wrapper.subprocess.Popen') as mock_popen:
             mock_process = Mock()
             
-            mock_stdout = Mock()
-            mock_stderr = Mock()
-            mock_stdout.readline = Mock(return_value='')
-            mock_stderr.readline = Mock(return_value='')
+            mock_stdout = BytesIO()
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
@@ -337,14 +329,8 @@ class TestSubprocessIntegration(unittest.TestCase):
             
             long_line = 'x' * 100000
             
-            mock_stdout = Mock()
-            mock_stderr = Mock()
-            mock_stdout.readline = Mock(side_effect=[
-                long_line + '\n',
-                long_line + '\n',
-                ''
-            ])
-            mock_stderr.readline = Mock(side_effect=[''])
+            mock_stdout = BytesIO((long_line + '\n' + long_line + '\n').encode('utf-8'))
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
@@ -366,10 +352,8 @@ class TestSubprocessIntegration(unittest.TestCase):
         with patch('tern.wrapper.subprocess.Popen') as mock_popen:
             mock_process = Mock()
             
-            mock_stdout = Mock()
-            mock_stderr = Mock()
-            mock_stdout.readline = Mock(side_effect=['output\n', ''])
-            mock_stderr.readline = Mock(side_effect=[''])
+            mock_stdout = BytesIO(b'output\n')
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
@@ -393,15 +377,8 @@ class TestSubprocessIntegration(unittest.TestCase):
         with patch('tern.wrapper.subprocess.Popen') as mock_popen:
             mock_process = Mock()
             
-            mock_stdout = Mock()
-            mock_stderr = Mock()
-            mock_stdout.readline = Mock(side_effect=[
-                'UTF-8: 你好世界\n',
-                'Emoji: 🚀 🎉\n',
-                'Latin-1: café\n',
-                ''
-            ])
-            mock_stderr.readline = Mock(side_effect=[''])
+            mock_stdout = BytesIO('UTF-8: 你好世界\nEmoji: 🚀 🎉\nLatin-1: café\n'.encode('utf-8'))
+            mock_stderr = BytesIO()
             mock_stdout.close = Mock()
             mock_stderr.close = Mock()
             
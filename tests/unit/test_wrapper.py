@@ -3,6 +3,7 @@
 import unittest
 import sys
 import os
+from io import BytesIO, StringIO
 from unittest.mock import Mock, patch, MagicMock, call
 import subprocess
 import queue
@@ -13,6 +14,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 from tern.wrapper import CommandWrapper
 from tern.config import Config
 
+from ._helpers import mocked_subprocess
+
 
 class TestCommandWrapper(unittest.TestCase):
     """Test cases for the CommandWrapper class."""
@@ -33,6 +36,27 @@ class TestCommandWrapper(unittest.TestCase):
         self.assertEqual(wrapper.ai_analyzer, self.mock_ai_analyzer)
         mock_ai_analyzer_class.assert_called_once_with(self.config)
     
+    @patch('tern.wrapper.AIAnalyzer')
+    def test_ai_analyzer_created_lazily(self, mock_ai_analyzer_class):
+        """Test that the AI analyzer is only built when first needed."""
+        wrapper = CommandWrapper(self.config)
+        mock_ai_analyzer_class.assert_not_called()
+        
+        with patch('tern.wrapper.subprocess.Popen') as mock_popen:
+            mock_process = Mock()
+            mock_process.wait.return_value = 0
+            mock_popen.return_value = mock_process
+            
+            with patch('tern.wrapper.threading.Thread'):
+                wrapper.run(['terraform', 'plan', '--no-ai'])
+        
+        mock_ai_analyzer_class.assert_not_called()
+        
+        first = wrapper.ai_analyzer
+        second = wrapper.ai_analyzer
+        self.assertIs(first, second)
+        mock_ai_analyzer_class.assert_called_once_with(self.config)
+    
     @patch('tern.wrapper.subprocess.Popen')
     @patch('tern.wrapper.threading.Thread')
     def test_run_terraform_command(self, mock_thread_class, mock_popen):
@@ -43,10 +67,8 @@ class TestCommandWrapper(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(side_effect=['output line\n', ''])
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(b'output line\n')
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -55,13 +77,11 @@ class TestCommandWrapper(unittest.TestCase):
         exit_code = wrapper.run(['terraform', 'plan'])
         
         mock_popen.assert_called_once_with(
-            'terraform plan',
-            shell=True,
+            ['terraform', 'plan'],
+            shell=False,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
         
         self.assertEqual(exit_code, 0)
@@ -86,13 +106,11 @@ class TestCommandWrapper(unittest.TestCase):
         exit_code = wrapper.run(['ls', '-la'])
         
         mock_popen.assert_called_once_with(
-            'ls -la',
-            shell=True,
+            ['ls', '-la'],
+            shell=False,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
         
         self.assertEqual(exit_code, 0)
@@ -102,39 +120,36 @@ class TestCommandWrapper(unittest.TestCase):
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
         
-        with patch('tern.wrapper.subprocess.Popen') as mock_popen:
-            mock_process = Mock()
-            mock_process.wait.return_value = 0
-            mock_process.stdout = Mock()
-            mock_process.stderr = Mock()
-            mock_popen.return_value = mock_process
-            
-            with patch('tern.wrapper.threading.Thread'):
-                wrapper.run(['terraform', 'plan', '--no-ai'])
-                
-                mock_popen.assert_called_once()
-                cmd = mock_popen.call_args[0][0]
-                self.assertEqual(cmd, 'terraform plan')
-                
-                self.mock_ai_analyzer.analyze.assert_not_called()
+        with mocked_subprocess() as (mock_popen, commands):
+            wrapper.run(['terraform', 'plan', '--no-ai'])
+        
+        mock_popen.assert_called_once()
+        self.assertEqual(commands, [['terraform', 'plan']])
+        self.mock_ai_analyzer.analyze.assert_not_called()
+    
+    def test_only_tern_flags_is_a_no_op(self):
+        """Test that a command made only of TERN flags runs nothing and succeeds."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        with mocked_subprocess() as (mock_popen, _):
+            with patch('builtins.print') as mock_print:
+                exit_code = wrapper.run(['--no-ai'])
+        
+        self.assertEqual(exit_code, 0)
+        mock_popen.assert_not_called()
+        mock_print.assert_not_called()
+        self.mock_ai_analyzer.analyze.assert_not_called()
     
     def test_deprecated_flags_removed(self):
         """Test that deprecated flags are silently removed."""
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
         
-        with patch('tern.wrapper.subprocess.Popen') as mock_popen:
-            mock_process = Mock()
-            mock_process.wait.return_value = 0
-            mock_process.stdout = Mock()
-            mock_process.stderr = Mock()
-            mock_popen.return_value = mock_process
-            
-            with patch('tern.wrapper.threading.Thread'):
-                wrapper.run(['terraform', 'plan', '--ai-verbose', '--ai-summary'])
-                
-                cmd = mock_popen.call_args[0][0]
-                self.assertEqual(cmd, 'terraform plan')
+        with mocked_subprocess() as (_, commands):
+            wrapper.run(['terraform', 'plan', '--ai-verbose', '--ai-summary'])
+        
+        self.assertEqual(commands, [['terraform', 'plan']])
     
     @patch('tern.wrapper.subprocess.Popen')
     @patch('builtins.print')
@@ -146,14 +161,14 @@ class TestCommandWrapper(unittest.TestCase):
         
         wrapper._analyze_and_display(
             command='destroy',
-            output_lines=['Destroying resource1', 'Destroying resource2'],
+            output_lines=[b'Destroying resource1\n', b'Destroying resource2\n'],
             error_lines=[],
             return_code=0
         )
         
         self.mock_ai_analyzer.analyze.assert_called_once_with(
             command='destroy',
-            output='Destroying resource1\nDestroying resource2',
+            output='Destroying resource1\nDestroying resource2\n',
             errors='',
             return_code=0
         )
@@ -172,7 +187,7 @@ class TestCommandWrapper(unittest.TestCase):
         
         wrapper._analyze_and_display(
             command='plan',
-            output_lines=['Planning...'],
+            output_lines=[b'Planning...\n'],
             error_lines=[],
             return_code=0
         )
@@ -180,7 +195,7 @@ class TestCommandWrapper(unittest.TestCase):
         wrapper.config.config['debug'] = True
         wrapper._analyze_and_display(
             command='plan',
-            output_lines=['Planning...'],
+            output_lines=[b'Planning...\n'],
             error_lines=[],
             return_code=0
         )
@@ -211,37 +226,25 @@ class TestCommandWrapper(unittest.TestCase):
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
         
-        with patch('tern.wrapper.subprocess.Popen') as mock_popen:
-            mock_process = Mock()
-            mock_process.wait.return_value = 0
-            mock_process.stdout = Mock()
-            mock_process.stderr = Mock()
-            mock_popen.return_value = mock_process
-            
-            with patch('tern.wrapper.threading.Thread'):
-                wrapper.run(['terraform', 'plan', '--no-ai', 'main.tf'])
-                
-                cmd = mock_popen.call_args[0][0]
-                self.assertEqual(cmd, 'terraform plan main.tf')
-                
-                self.mock_ai_analyzer.analyze.assert_not_called()
+        with mocked_subprocess() as (_, commands):
+            wrapper.run(['terraform', 'plan', '--no-ai', 'main.tf'])
+        
+        self.assertEqual(commands, [['terraform', 'plan', 'main.tf']])
+        self.mock_ai_analyzer.analyze.assert_not_called()
     
     @patch('tern.wrapper.subprocess.Popen')
     @patch('tern.wrapper.threading.Thread')
-    @patch('builtins.print')
-    def test_real_time_output_display(self, mock_print, mock_thread_class, mock_popen):
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_real_time_output_display(self, mock_stdout, mock_thread_class, mock_popen):
         """Test that output is displayed in real-time."""
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        
-        output_lines = ['Line 1\n', 'Line 2\n', 'Line 3\n', '']
-        mock_process.stdout.readline = Mock(side_effect=output_lines)
-        mock_process.stderr.readline = Mock(return_value='')
+        output_lines = ['Line 1\n', 'Line 2\n', 'Line 3\n']
+        mock_process.stdout = BytesIO(''.join(output_lines).encode('utf-8'))
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None):
@@ -255,12 +258,10 @@ class TestCommandWrapper(unittest.TestCase):
         
         mock_thread_class.side_effect = mock_thread_init
         
-        wrapper.run(['terraform', 'init'])
+        with patch('builtins.print'):
+            wrapper.run(['terraform', 'init'])
         
-        print_calls = [call[0][0] if call[0] else '' for call in mock_print.call_args_list]
-        self.assertIn('Line 1', print_calls)
-        self.assertIn('Line 2', print_calls)
-        self.assertIn('Line 3', print_calls)
+        self.assertIn('Line 1\nLine 2\nLine 3\n', mock_stdout.getvalue())
     
     @patch('tern.wrapper.subprocess.Popen')
     def test_process_error_handling(self, mock_popen):
@@ -278,6 +279,72 @@ class TestCommandWrapper(unittest.TestCase):
             print_calls = [str(call) for call in mock_print.call_args_list]
             self.assertTrue(any('Error' in str(call) for call in print_calls))
 
+    
+    def test_run_batch_analyzes_each_command(self):
+        """Test that batch mode runs commands in order and analyzes each one."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        self.mock_ai_analyzer.analyze.side_effect = lambda command, **kwargs: f"analysis of {command}"
+        
+        results = {
+            'terraform init': (0, [b'init ok\n'], []),
+            'terraform validate': (1, [], [b'Error: bad\n']),
+            'terraform fmt -check': (3, [b'main.tf\n'], []),
+        }
+        executed = []
+        def fake_execute(args, command_str):
+            executed.append(command_str)
+            return results[command_str]
+        
+        lines = ['terraform init\n', '\n', '# comment\n', 'terraform validate\n', 'terraform fmt -check\n']
+        with patch.object(wrapper, '_execute', side_effect=fake_execute):
+            with patch('sys.stdout.isatty', return_value=True):
+                with patch('builtins.print') as mock_print:
+                    exit_code = wrapper.run_batch(lines)
+        
+        self.assertEqual(executed, ['terraform init', 'terraform validate', 'terraform fmt -check'])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(self.mock_ai_analyzer.analyze.call_count, 3)
+        printed = [c[0][0] for c in mock_print.call_args_list if c[0]]
+        analyses = [p for p in printed if p.startswith('analysis of')]
+        self.assertEqual(analyses, ['analysis of terraform init',
+                                    'analysis of terraform validate',
+                                    'analysis of terraform fmt -check'])
+    
+    @patch('tern.wrapper.AIAnalyzer')
+    def test_run_batch_builds_one_analyzer(self, mock_ai_analyzer_class):
+        """Test that batch mode builds the analyzer once, not once per worker."""
+        built_on = []
+        def build_analyzer(config):
+            built_on.append(threading.current_thread())
+            return self.mock_ai_analyzer
+        mock_ai_analyzer_class.side_effect = build_analyzer
+        self.mock_ai_analyzer.analyze.return_value = None
+        wrapper = CommandWrapper(self.config)
+        
+        lines = [f'echo {i}\n' for i in range(4)]
+        with patch.object(wrapper, '_execute', return_value=(0, [b'ok\n'], [])):
+            with patch('sys.stdout.isatty', return_value=True):
+                exit_code = wrapper.run_batch(lines)
+        
+        self.assertEqual(exit_code, 0)
+        mock_ai_analyzer_class.assert_called_once_with(self.config)
+        self.assertEqual(built_on, [threading.main_thread()])
+        self.assertEqual(self.mock_ai_analyzer.analyze.call_count, 4)
+    
+    def test_batch_flag_reads_stdin(self):
+        """Test that --batch reads commands from stdin and honors --no-ai."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        with patch.object(wrapper, '_execute', return_value=(0, [b'ok\n'], [])) as mock_execute:
+            with patch('sys.stdin', StringIO('ls\npwd\n')):
+                with patch('sys.stdout.isatty', return_value=True):
+                    exit_code = wrapper.run(['--batch', '--no-ai'])
+        
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(mock_execute.call_count, 2)
+        self.mock_ai_analyzer.analyze.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 """Test edge cases and error conditions for the wrapper."""
 
 import unittest
+from io import BytesIO
 from unittest.mock import Mock, patch, MagicMock
 import subprocess
 import sys
@@ -10,6 +11,7 @@ import os
 
 from tern.wrapper import CommandWrapper
 from tern.config import Config
+from tern.ai_analyzer import AIAnalyzer
 
 
 class TestWrapperEdgeCases(unittest.TestCase):
@@ -32,8 +34,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         mock_process.stderr = Mock()
         
         stdout_lines = [f'line {i}\n' for i in range(10)] + ['']
-        mock_process.stdout.readline = Mock(side_effect=stdout_lines)
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(''.join(stdout_lines).encode('utf-8'))
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -53,12 +55,11 @@ class TestWrapperEdgeCases(unittest.TestCase):
         call_args = wrapper.ai_analyzer.analyze.call_args
         if call_args:
             output = call_args[1]['output']
-            lines = output.split('\n')
+            lines = output.splitlines()
             self.assertLessEqual(len(lines), 5)
     
     @patch('tern.wrapper.subprocess.Popen')
-    @patch('builtins.print')
-    def test_ioerror_handling(self, mock_print, mock_popen):
+    def test_ioerror_handling(self, mock_popen):
         """Test that IOError is handled like BrokenPipeError."""
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
@@ -66,33 +67,33 @@ class TestWrapperEdgeCases(unittest.TestCase):
         mock_process = Mock()
         mock_process.wait.return_value = 0
         mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        
-        output_count = [0]
-        def readline_side_effect():
-            output_count[0] += 1
-            if output_count[0] <= 2:
-                return f'line {output_count[0]}\n'
-            return ''
-        
-        mock_process.stdout.readline = Mock(side_effect=readline_side_effect)
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout.read.side_effect = [b'line 1\n', b'line 2\n', b'']
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
-        print_count = [0]
-        def print_side_effect(*args, **kwargs):
-            print_count[0] += 1
-            if print_count[0] >= 2:
+        write_count = [0]
+        def write_side_effect(data):
+            write_count[0] += 1
+            if write_count[0] >= 2:
                 raise IOError("I/O error")
-            return None
         
-        mock_print.side_effect = print_side_effect
+        mock_stdout = Mock()
+        mock_stdout.isatty.return_value = True
+        mock_stdout.buffer.write.side_effect = write_side_effect
         
-        with patch('sys.stdout.isatty', return_value=True):
-            with patch('tern.wrapper.threading.Thread'):
-                exit_code = wrapper.run(['ls'])
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        with patch('sys.stdout', mock_stdout):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    exit_code = wrapper.run(['ls'])
         
         self.assertEqual(exit_code, 0)
+        self.assertEqual(write_count[0], 2)
     
     @patch('tern.wrapper.subprocess.Popen')
     def test_command_with_no_output(self, mock_popen):
@@ -102,10 +103,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         with patch('sys.stdout.isatty', return_value=True):
@@ -125,10 +124,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 1
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(side_effect=['Error: Something failed\n', ''])
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO(b'Error: Something failed\n')
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -158,10 +155,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 127
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         with patch('sys.stdout.isatty', return_value=True):
@@ -174,9 +169,7 @@ class TestWrapperEdgeCases(unittest.TestCase):
             shell=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
     
     @patch('tern.wrapper.subprocess.Popen')
@@ -187,10 +180,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         with patch('sys.stdout.isatty', return_value=True):
@@ -214,8 +205,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         mock_process.stderr = Mock()
         
         very_long_line = 'x' * (10 * 1024 * 1024) + '\n'
-        mock_process.stdout.readline = Mock(side_effect=[very_long_line, ''])
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(very_long_line.encode('utf-8'))
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -252,8 +243,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
             'Math: ∑ ∫ π\n',
             ''
         ]
-        mock_process.stdout.readline = Mock(side_effect=unicode_lines)
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(''.join(unicode_lines).encode('utf-8'))
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -283,10 +274,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         very_long_args = ['echo'] + ['arg' * 100 for _ in range(1000)]
@@ -298,8 +287,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         
         self.assertEqual(exit_code, 0)
         cmd = mock_popen.call_args[0][0]
-        self.assertTrue(cmd.startswith('echo'))
-        self.assertGreater(len(cmd), 100000)
+        self.assertEqual(cmd[0], 'echo')
+        self.assertGreater(len(' '.join(cmd)), 100000)
     
     @patch('tern.wrapper.subprocess.Popen')
     def test_concurrent_heavy_output(self, mock_popen):
@@ -315,8 +304,8 @@ class TestWrapperEdgeCases(unittest.TestCase):
         stdout_lines = [f'stdout {i}\n' for i in range(100)] + ['']
         stderr_lines = [f'stderr {i}\n' for i in range(100)] + ['']
         
-        mock_process.stdout.readline = Mock(side_effect=stdout_lines)
-        mock_process.stderr.readline = Mock(side_effect=stderr_lines)
+        mock_process.stdout = BytesIO(''.join(stdout_lines).encode('utf-8'))
+        mock_process.stderr = BytesIO(''.join(stderr_lines).encode('utf-8'))
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -338,6 +327,162 @@ class TestWrapperEdgeCases(unittest.TestCase):
         self.assertIn('stdout', call_args['output'])
         self.assertIn('stderr', call_args['errors'])
 
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    def test_non_utf8_output_passed_through(self, mock_popen):
+        """Test that raw bytes reach stdout unchanged and are decoded only for analysis."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        raw = b'ok \xff\xfe bytes\n'
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO(raw)
+        mock_process.stderr = BytesIO()
+        mock_popen.return_value = mock_process
+        
+        mock_stdout = Mock()
+        mock_stdout.isatty.return_value = True
+        
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        with patch('sys.stdout', mock_stdout):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    wrapper.run(['cat', 'blob.bin'])
+        
+        mock_stdout.buffer.write.assert_called_once_with(raw)
+        output = wrapper.ai_analyzer.analyze.call_args[1]['output']
+        self.assertEqual(output, 'ok \ufffd\ufffd bytes\n')
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    def test_capture_keeps_tail_within_output_char_budget(self, mock_popen):
+        """Test that captured output is the tail of the stream, bounded by limits.output_chars."""
+        self.config.config['limits'] = {'output_chars': 100, 'error_chars': 50}
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO(b'a' * 99 + b'\n' + b'b' * 1000 + b'\n' + b'c' * 1000 + b'\n')
+        mock_process.stderr = BytesIO(b'e' * 1000 + b'\n')
+        mock_popen.return_value = mock_process
+        
+        mock_stdout = Mock()
+        mock_stdout.isatty.return_value = True
+        
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        with patch('sys.stdout', mock_stdout), patch('sys.stderr', Mock()):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    wrapper.run(['cat', 'big.log'])
+        
+        # Everything is still displayed in full
+        written = b''.join(c[0][0] for c in mock_stdout.buffer.write.call_args_list)
+        self.assertEqual(written, b'a' * 99 + b'\n' + b'b' * 1000 + b'\n' + b'c' * 1000 + b'\n')
+        call_args = wrapper.ai_analyzer.analyze.call_args[1]
+        self.assertEqual(call_args['output'], 'c' * 399 + '\n')
+        self.assertEqual(call_args['errors'], 'e' * 199 + '\n')
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    def test_last_lines_of_long_output_reach_analysis(self, mock_popen):
+        """Test that an over-budget stream sends its last lines, not its first, to the AI."""
+        self.config.config['limits'] = {'output_chars': 50, 'error_chars': 50, 'max_lines': 100}
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO(''.join(f'{i}\n' for i in range(1, 1001)).encode())
+        mock_process.stderr = BytesIO()
+        mock_popen.return_value = mock_process
+        
+        mock_stdout = Mock()
+        mock_stdout.isatty.return_value = True
+        
+        with patch('sys.stdout', mock_stdout), patch('sys.stderr', Mock()):
+            with patch('tern.wrapper.threading.Thread'):
+                with patch('builtins.print'):
+                    wrapper.run(['seq', '1', '1000'])
+        
+        output = wrapper.ai_analyzer.analyze.call_args[1]['output']
+        self.assertTrue(output.endswith('998\n999\n1000\n'))
+        self.assertFalse(output.startswith('1\n'))
+        self.assertLessEqual(len(output), 200)
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    def test_last_lines_of_long_output_reach_prompt(self, mock_popen):
+        """Test that the prompt built from over-limit output ends with its last line."""
+        self.config.config['limits'] = {'output_chars': 1000, 'error_chars': 100}
+        wrapper = CommandWrapper(self.config)
+        analyzer = AIAnalyzer.__new__(AIAnalyzer)
+        analyzer.config = self.config
+        analyzer.bedrock_client = Mock()
+        wrapper.ai_analyzer = analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 1
+        mock_process.stdout = BytesIO(''.join(f'{i}\n' for i in range(1, 100001)).encode())
+        mock_process.stderr = BytesIO(b'warning\n' * 1000 + b'Error: exit status 1\n')
+        mock_popen.return_value = mock_process
+        
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        prompts = []
+        with patch.object(AIAnalyzer, '_invoke_model', side_effect=prompts.append), \
+                patch('sys.stdout', Mock()), patch('sys.stderr', Mock()):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    wrapper.run(['seq', '1', '100000'])
+        
+        prompt, = prompts
+        out = prompt.split('Output:\n```\n', 1)[1].split('\n```', 1)[0]
+        err = prompt.split('Errors:\n```\n', 1)[1].split('\n```', 1)[0]
+        self.assertTrue(out.endswith('99999\n100000\n'))
+        self.assertEqual(len(out), 1000)
+        self.assertTrue(err.endswith('warning\nError: exit status 1\n'))
+        self.assertEqual(len(err), 100)
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    def test_lines_split_across_reads(self, mock_popen):
+        """Test that lines spanning several pipe reads are reassembled for max_lines."""
+        self.config.config['limits']['max_lines'] = 2
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = Mock()
+        mock_process.stdout.read.side_effect = [b'fir', b'st\nsec', b'ond\nthi', b'rd', b'']
+        mock_process.stderr = BytesIO()
+        mock_popen.return_value = mock_process
+        
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        with patch('sys.stdout.isatty', return_value=True):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    wrapper.run(['cat', 'file.txt'])
+        
+        output = wrapper.ai_analyzer.analyze.call_args[1]['output']
+        self.assertEqual(output, 'second\nthird')
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -4,14 +4,14 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import subprocess
 import sys
-from io import StringIO
+from io import BytesIO
 
 from tern.wrapper import CommandWrapper
 from tern.config import Config
 
 
 class TestShellCommandHandling(unittest.TestCase):
-    """Test shell=True command execution and pipe detection."""
+    """Test shell command execution and pipe detection."""
     
     def setUp(self):
         self.config = Config(require_config_file=False)
@@ -26,10 +26,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(side_effect=['output\n', ''])
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(b'output\n')
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -43,9 +41,7 @@ class TestShellCommandHandling(unittest.TestCase):
             shell=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
     
     @patch('tern.wrapper.subprocess.Popen')
@@ -58,10 +54,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(side_effect=['output\n', ''])
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(b'output\n')
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -87,10 +81,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -104,9 +96,7 @@ class TestShellCommandHandling(unittest.TestCase):
             shell=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
     
     @patch('tern.wrapper.subprocess.Popen')
@@ -118,10 +108,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -135,14 +123,11 @@ class TestShellCommandHandling(unittest.TestCase):
             shell=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
     
     @patch('tern.wrapper.subprocess.Popen')
-    @patch('builtins.print')
-    def test_broken_pipe_handling(self, mock_print, mock_popen):
+    def test_broken_pipe_handling(self, mock_popen):
         """Test that BrokenPipeError is handled gracefully."""
         wrapper = CommandWrapper(self.config)
         wrapper.ai_analyzer = self.mock_ai_analyzer
@@ -150,37 +135,36 @@ class TestShellCommandHandling(unittest.TestCase):
         mock_process = Mock()
         mock_process.wait.return_value = 0
         mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        
-        output_count = [0]
-        def readline_side_effect():
-            output_count[0] += 1
-            if output_count[0] == 1:
-                return 'line 1\n'
-            elif output_count[0] == 2:
-                return 'line 2\n'
-            else:
-                return ''
-        
-        mock_process.stdout.readline = Mock(side_effect=readline_side_effect)
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout.read.side_effect = [b'line 1\n', b'line 2\n', b'line 3\n', b'']
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
-        print_count = [0]
-        original_print = print
-        def print_side_effect(*args, **kwargs):
-            print_count[0] += 1
-            if print_count[0] >= 3:
+        write_count = [0]
+        def write_side_effect(data):
+            write_count[0] += 1
+            if write_count[0] >= 2:
                 raise BrokenPipeError("Broken pipe")
-            return None
         
-        mock_print.side_effect = print_side_effect
+        mock_stdout = Mock()
+        mock_stdout.isatty.return_value = True
+        mock_stdout.buffer.write.side_effect = write_side_effect
         
-        with patch('sys.stdout.isatty', return_value=True):
-            with patch('tern.wrapper.threading.Thread'):
-                exit_code = wrapper.run(['ls', '-la'])
+        def mock_thread_init(target=None, args=None, **kwargs):
+            thread = Mock()
+            if target:
+                target(*args)
+            return thread
+        
+        with patch('sys.stdout', mock_stdout):
+            with patch('tern.wrapper.threading.Thread', side_effect=mock_thread_init):
+                with patch('builtins.print'):
+                    exit_code = wrapper.run(['ls', '-la'])
         
         self.assertEqual(exit_code, 0)
+        # Reading and writing stop at the first broken pipe
+        self.assertEqual(write_count[0], 2)
+        self.assertEqual(mock_process.stdout.read.call_count, 2)
+        mock_process.stdout.close.assert_called_once()
     
     @patch('tern.wrapper.subprocess.Popen')
     @patch('tern.wrapper.threading.Thread')
@@ -191,10 +175,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(return_value='')
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -208,9 +190,7 @@ class TestShellCommandHandling(unittest.TestCase):
             shell=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
     
     @patch('tern.wrapper.subprocess.Popen')
@@ -224,10 +204,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         mock_process = Mock()
         mock_process.wait.return_value = 0
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.stdout.readline = Mock(side_effect=['output line 1\n', 'output line 2\n', ''])
-        mock_process.stderr.readline = Mock(return_value='')
+        mock_process.stdout = BytesIO(b'output line 1\noutput line 2\n')
+        mock_process.stderr = BytesIO()
         mock_popen.return_value = mock_process
         
         mock_thread = Mock()
@@ -255,8 +233,8 @@ class TestShellCommandHandling(unittest.TestCase):
         
         stdout_lines = ['output\n', '']
         stderr_lines = ['']
-        mock_process.stdout.readline = Mock(side_effect=stdout_lines)
-        mock_process.stderr.readline = Mock(side_effect=stderr_lines)
+        mock_process.stdout = BytesIO(''.join(stdout_lines).encode('utf-8'))
+        mock_process.stderr = BytesIO(''.join(stderr_lines).encode('utf-8'))
         mock_popen.return_value = mock_process
         
         def mock_thread_init(target=None, args=None, **kwargs):
@@ -274,11 +252,101 @@ class TestShellCommandHandling(unittest.TestCase):
         
         wrapper.ai_analyzer.analyze.assert_called_once_with(
             command='echo test',
-            output='output',
+            output='output\n',
             errors='',
             return_code=0
         )
 
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    @patch('tern.wrapper.threading.Thread')
+    def test_plain_command_skips_shell(self, mock_thread_class, mock_popen):
+        """Test that commands with no shell syntax are exec'd without /bin/sh."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
+        mock_popen.return_value = mock_process
+        
+        with patch('sys.stdout.isatty', return_value=True):
+            wrapper.run(['terraform', 'plan', '-var-file=prod.tfvars'])
+        
+        mock_popen.assert_called_once_with(
+            ['terraform', 'plan', '-var-file=prod.tfvars'],
+            shell=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    @patch('tern.wrapper.threading.Thread')
+    def test_env_assignment_uses_shell(self, mock_thread_class, mock_popen):
+        """Test that a leading VAR=value assignment is handed to the shell."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
+        mock_popen.return_value = mock_process
+        
+        with patch('sys.stdout.isatty', return_value=True):
+            wrapper.run(['TF_LOG=debug', 'terraform', 'plan'])
+        
+        mock_popen.assert_called_once_with(
+            'TF_LOG=debug terraform plan',
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    @patch('tern.wrapper.threading.Thread')
+    def test_builtin_falls_back_to_shell(self, mock_thread_class, mock_popen):
+        """Test that a command not found on PATH is retried through the shell."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 0
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO()
+        mock_popen.side_effect = [FileNotFoundError('cd'), mock_process]
+        
+        with patch('sys.stdout.isatty', return_value=True):
+            exit_code = wrapper.run(['cd', 'modules'])
+        
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(mock_popen.call_count, 2)
+        self.assertEqual(mock_popen.call_args[0][0], 'cd modules')
+        self.assertTrue(mock_popen.call_args[1]['shell'])
+    
+    @patch('tern.wrapper.subprocess.Popen')
+    @patch('tern.wrapper.threading.Thread')
+    def test_non_executable_falls_back_to_shell(self, mock_thread_class, mock_popen):
+        """Test that a file that can't be exec'd is retried through the shell, which reports rc 126."""
+        wrapper = CommandWrapper(self.config)
+        wrapper.ai_analyzer = self.mock_ai_analyzer
+        
+        mock_process = Mock()
+        mock_process.wait.return_value = 126
+        mock_process.stdout = BytesIO()
+        mock_process.stderr = BytesIO(b'/bin/sh: 1: ./script.sh: Permission denied\n')
+        mock_popen.side_effect = [PermissionError(13, 'Permission denied'), mock_process]
+        
+        with patch('sys.stdout.isatty', return_value=False), patch('builtins.print'):
+            exit_code = wrapper.run(['./script.sh'])
+        
+        self.assertEqual(exit_code, 126)
+        self.assertEqual(mock_popen.call_count, 2)
+        self.assertEqual(mock_popen.call_args[0][0], './script.sh')
+        self.assertTrue(mock_popen.call_args[1]['shell'])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file